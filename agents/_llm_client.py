@@ -0,0 +1,62 @@
+# -*- coding: utf-8 -*-
+"""
+各 Agent 共用的 LLM 连接：OpenAI client 按 (base_url, api_key) 缓存、复用 HTTP 连接池；
+LM Studio 未配置模型时自动探测的模型 id 按 base_url 缓存。全进程只有这一份缓存。
+"""
+from __future__ import annotations
+
+import functools
+import time
+from typing import Any, Dict, Optional, Tuple
+
+
+@functools.lru_cache(maxsize=4)
+def make_client(base_url: Optional[str], api_key: str) -> Any:
+    """按 (base_url, api_key) 缓存 OpenAI client；base_url 为 None 表示 OpenAI 官方。"""
+    from openai import OpenAI
+    if base_url is None:
+        return OpenAI(api_key=api_key)
+    return OpenAI(base_url=base_url, api_key=api_key)
+
+
+# 探测到的模型 id 缓存 5 分钟，避免每次请求都查 /models（LM Studio 换模型时由 401/404 触发失效，见 invalidate_on_model_error）；
+# 探测失败也缓存，但只缓存 60 秒：TTL 内不再反复等 3 秒超时，LM Studio 稍后启动也能较快恢复
+MODEL_DISCOVERY_TTL_SEC = 300.0
+MODEL_DISCOVERY_FAIL_TTL_SEC = 60.0
+_discovered_models: Dict[str, Tuple[float, str]] = {}
+
+
+def discover_model(
+    client: Any,
+    base_url: str,
+    ttl_sec: float = MODEL_DISCOVERY_TTL_SEC,
+    fail_ttl_sec: float = MODEL_DISCOVERY_FAIL_TTL_SEC,
+) -> str:
+    """返回 base_url 上 /models 的第一个模型 id；成功结果缓存 ttl_sec 秒，失败（空串）缓存 fail_ttl_sec 秒。"""
+    now = time.monotonic()
+    hit = _discovered_models.get(base_url)
+    if hit is not None and now - hit[0] < (ttl_sec if hit[1] else fail_ttl_sec):
+        return hit[1]
+    model = ""
+    try:
+        models = client.models.list(timeout=3)
+        if models.data and len(models.data) > 0:
+            model = models.data[0].id
+    except Exception:
+        pass
+    _discovered_models[base_url] = (now, model)
+    return model
+
+
+def invalidate_model_cache(base_url: Optional[str] = None) -> None:
+    """清除自动探测的模型 id（base_url 为 None 时全部清除），下次请求重新查 /models；LM Studio 换模型后调用。"""
+    if base_url is None:
+        _discovered_models.clear()
+    else:
+        _discovered_models.pop(base_url, None)
+
+
+def invalidate_on_model_error(e: BaseException) -> None:
+    """401/404 多半是缓存的模型 id 已被卸载或换掉：清掉缓存，下一次请求重新探测。各 Agent 的 LLM 异常处理里调用。"""
+    if getattr(e, "status_code", None) in (401, 404):
+        invalidate_model_cache()
@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+"""
+可选：numba 编译的 Ratcliff-Obershelp 相似度，供 debounce 在未装 difflib-fast 时使用。
+算法与 difflib.SequenceMatcher(None, a, b).ratio() 逐步一致（同样的最长匹配选取与递归），
+但 difflib 在 len(b) >= 200 时会启用 autojunk 启发式，此时结果不同，调用方需回退 difflib。
+"""
+from __future__ import annotations
+
+import functools
+
+try:
+    import numba
+    import numpy as np
+    HAS_NUMBA = True
+except ImportError:
+    HAS_NUMBA = False
+
+# difflib 的 autojunk 仅在 len(b) >= 200 时生效；低于此长度时本模块结果与 difflib 完全一致
+AUTOJUNK_MIN_LEN = 200
+
+
+if HAS_NUMBA:
+
+    # nogil：比对期间释放 GIL，主线程取帧/界面不被去抖计算卡住（与 difflib-fast 批量接口一致）
+    @numba.njit(cache=True, nogil=True)
+    def _ro_matches(a, b):
+        """a、b 为码点数组，返回 matching blocks 的总长度（即 difflib 的 M）。"""
+        na = a.shape[0]
+        nb = b.shape[0]
+        prev = np.zeros(nb + 1, dtype=np.int32)
+        cur = np.zeros(nb + 1, dtype=np.int32)
+        total = 0
+        stack = [(0, na, 0, nb)]
+        while len(stack) > 0:
+            alo, ahi, blo, bhi = stack.pop()
+            # find_longest_match：prev[j+1] 为以 (i-1, j) 结尾的公共子串长度
+            for j in range(blo, bhi + 1):
+                prev[j] = 0
+            besti = alo
+            bestj = blo
+            bestsize = 0
+            for i in range(alo, ahi):
+                ai = a[i]
+                cur[blo] = 0
+                for j in range(blo, bhi):
+                    if ai == b[j]:
+                        k = prev[j] + 1
+                        cur[j + 1] = k
+                        if k > bestsize:
+                            besti = i - k + 1
+                            bestj = j - k + 1
+                            bestsize = k
+                    else:
+                        cur[j + 1] = 0
+                prev, cur = cur, prev
+            if bestsize > 0:
+                total += bestsize
+                if alo < besti and blo < bestj:
+                    stack.append((alo, besti, blo, bestj))
+                if besti + bestsize < ahi and bestj + bestsize < bhi:
+                    stack.append((besti + bestsize, ahi, bestj + bestsize, bhi))
+        return total
+
+    @functools.lru_cache(maxsize=64)
+    def _codes(text: str) -> "np.ndarray":
+        """文本转 Unicode 码点数组（按字符而非 UTF-8 字节，保证与 difflib 的长度一致）；同一文本只转一次。"""
+        return np.frombuffer(text.encode("utf-32-le"), dtype=np.uint32)
+
+    def ratio(a: str, b: str) -> float:
+        """同 difflib.SequenceMatcher(None, a, b).ratio()，要求 len(b) < AUTOJUNK_MIN_LEN。"""
+        la, lb = len(a), len(b)
+        if la + lb == 0:
+            return 1.0
+        return 2.0 * _ro_matches(_codes(a), _codes(b)) / (la + lb)
+
+    # 导入时用极短输入预热 JIT（cache=True 时后续进程直接读磁盘缓存）
+    try:
+        ratio("ab", "ab")
+    except Exception:
+        HAS_NUMBA = False
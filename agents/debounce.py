@@ -2,26 +2,95 @@
 """Agent B：OCR 结果去抖动，最近 N 次中至少 K 次相同（或相似）才视为稳定。"""
 from __future__ import annotations
 
-from collections import deque
-from typing import Optional
+from collections import Counter, deque
+from typing import Dict, List, Optional, Sequence, Tuple
 
 import difflib
 
+import config
+from agents import _simfast
+from agents.agent_e import normalize_text
+
+# 可选：difflib-fast（Rust 实现，结果与 SequenceMatcher.ratio 一致；批量接口释放 GIL 并行计算）
+try:
+    from difflib_fast import ratio as _fast_ratio
+    _HAS_DIFFLIB_FAST = True
+except ImportError:
+    _HAS_DIFFLIB_FAST = False
+
+# 可选：rapidfuzz（C++ 位并行 LCS）。其 fuzz.ratio 基于 LCS，与 difflib 结果不同，不能直接替换；
+# 但 difflib 的匹配块本身是一个公共子序列，2*LCS/(la+lb) 必然 >= ratio，可作为精确的预筛上界
+try:
+    from rapidfuzz.distance import LCSseq as _LCSseq
+    _HAS_RAPIDFUZZ = True
+except ImportError:
+    _HAS_RAPIDFUZZ = False
+# config.OCR_SIMILARITY_BACKEND="rapidfuzz" 时直接以 2*LCS/(la+lb)（即 rapidfuzz 的 Indel 相似度）作为相似度：
+# 比 difflib 快得多，但数值 >= difflib，同一阈值下判定更宽松；导入时决定一次
+_USE_LCS_RATIO = _HAS_RAPIDFUZZ and getattr(config, "OCR_SIMILARITY_BACKEND", "difflib") == "rapidfuzz"
+# 仅在没有 difflib-fast（本身已足够快）时用 LCS 上界预筛；LCS 已是相似度本身时无需预筛
+_USE_LCS_BOUND = _HAS_RAPIDFUZZ and not _HAS_DIFFLIB_FAST and not _USE_LCS_RATIO
+
 
 def _normalize_for_vote(text: str) -> str:
-    """用于投票的归一化：去首尾空白、合并空白。"""
-    return " ".join((text or "").strip().split())
+    """用于投票的归一化：去首尾空白、合并空白。与 LLMCache 的缓存键归一化共用同一实现。"""
+    return normalize_text(text)
 
 
-def text_similarity(a: str, b: str) -> float:
-    """简单相似度：0~1，1 表示完全相同，用于“软稳定”判断。"""
+def text_similarity(a: str, b: str, min_ratio: float = 0.0) -> float:
+    """
+    简单相似度：0~1，1 表示完全相同，用于“软稳定”判断。
+    min_ratio：调用方的判定阈值；长度差决定的上界 2*min/(la+lb) 已低于它时直接返回该上界，不做完整比对。
+    """
     a_n = _normalize_for_vote(a)
     b_n = _normalize_for_vote(b)
-    if not a_n and not b_n:
+    if a_n == b_n:
         return 1.0
     if not a_n or not b_n:
         return 0.0
-    return difflib.SequenceMatcher(None, a_n, b_n).ratio()
+    la, lb = len(a_n), len(b_n)
+    upper = 2.0 * min(la, lb) / (la + lb)
+    if upper < min_ratio:
+        return upper
+    if min_ratio > 0 and _USE_LCS_BOUND:
+        upper = _lcs_upper(a_n, b_n)
+        if upper < min_ratio:
+            return upper
+    return _ratio(a_n, b_n)
+
+
+def _lcs_upper(a: str, b: str) -> float:
+    """difflib ratio 的上界 2*LCS/(la+lb)（rapidfuzz 计算 LCS 长度；与 difflib 同一公式，浮点比较无误差）。"""
+    return 2.0 * _LCSseq.similarity(a, b) / (len(a) + len(b))
+
+
+def _ratio(a: str, b: str) -> float:
+    """单对相似度（输入已归一化）：difflib-fast > numba 编译版（b 较短时与 difflib 一致）> difflib；选用 rapidfuzz 时为 LCS 相似度。"""
+    if _USE_LCS_RATIO:
+        return _lcs_upper(a, b)
+    if _HAS_DIFFLIB_FAST:
+        return _fast_ratio(a, b)
+    if _simfast.HAS_NUMBA and len(b) < _simfast.AUTOJUNK_MIN_LEN:
+        return _simfast.ratio(a, b)
+    return difflib.SequenceMatcher(None, a, b).ratio()
+
+
+def _similarity_batch(pairs: Sequence[Tuple[str, str]]) -> List[float]:
+    """
+    批量相似度（输入已归一化）：有 difflib-fast 时非空文本对一次性交给 Rust 计算，
+    否则逐对计算；空串约定与 text_similarity 一致。
+    """
+    out = [1.0 if a == b else 0.0 for a, b in pairs]
+    idx = [i for i, (a, b) in enumerate(pairs) if a and b and a != b]
+    if not idx:
+        return out
+    if _HAS_DIFFLIB_FAST and not _USE_LCS_RATIO:
+        ratios = _fast_ratio([pairs[i] for i in idx])
+    else:
+        ratios = [_ratio(*pairs[i]) for i in idx]
+    for i, r in zip(idx, ratios):
+        out[i] = r
+    return out
 
 
 class OCRDebouncer:
@@ -39,37 +108,70 @@ class OCRDebouncer:
         self._min_votes = max(1, min_votes)
         self._similarity_vote = max(0.0, min(1.0, float(similarity_vote)))
         self._q: deque[str] = deque(maxlen=self._history_len)
+        # 窗口内各文本出现次数，随 add() 增量维护，避免每次判断都重建 Counter
+        self._counts: Counter[str] = Counter()
+        # 同一窗口内 is_stable/get_stable/is_soft_stable 共用的相似度结果，add() 时失效
+        self._vote_cache: Optional[Tuple[List[str], List[int], Dict[Tuple[str, str], float]]] = None
 
     def add(self, raw_text: str) -> None:
         normalized = _normalize_for_vote(raw_text)
+        if len(self._q) == self._history_len:
+            oldest = self._q[0]
+            self._counts[oldest] -= 1
+            if self._counts[oldest] <= 0:
+                del self._counts[oldest]
         self._q.append(normalized)
+        self._counts[normalized] += 1
+        self._vote_cache = None
+
+    def _similar_counts(self) -> Tuple[List[str], List[int], Dict[Tuple[str, str], float]]:
+        """
+        相似投票计数：返回 (去重后的候选, 各候选的票数, 已算过的文本对相似度)，结果按窗口缓存。
+        票数 = 窗口内与候选相似度 >= similarity_vote 的条目数。相同文本只算一次再按出现次数加权；
+        长度差过大（上界 2*min/(la+lb)）或 LCS 上界已低于阈值的文本对直接跳过，不做相似度计算。
+        """
+        if self._vote_cache is not None:
+            return self._vote_cache
+        counts = self._counts
+        uniq = list(dict.fromkeys(self._q))
+        th = self._similarity_vote
+        pairs: List[Tuple[str, str]] = []
+        owners: List[Tuple[int, int]] = []
+        for i, c in enumerate(uniq):
+            for j, t in enumerate(uniq):
+                la, lb = len(c), len(t)
+                if 2 * min(la, lb) < th * (la + lb):
+                    continue
+                if _USE_LCS_BOUND and c != t and c and t and _lcs_upper(c, t) < th:
+                    continue
+                pairs.append((c, t))
+                owners.append((i, j))
+        ratios = _similarity_batch(pairs)
+        votes = [0] * len(uniq)
+        for (i, j), r in zip(owners, ratios):
+            if r >= th:
+                votes[i] += counts[uniq[j]]
+        self._vote_cache = (uniq, votes, dict(zip(pairs, ratios)))
+        return self._vote_cache
 
     def get_stable(self) -> str:
         """返回稳定文本：若某值（或相似簇）出现次数 >= min_votes 则返回该代表，否则返回最近一次。"""
         if not self._q:
             return ""
         if self._similarity_vote <= 0:
-            from collections import Counter
-            c = Counter(self._q)
-            most_common = c.most_common(1)
-            if most_common and most_common[0][1] >= self._min_votes:
-                return most_common[0][0]
+            top = max(self._counts.values())
+            if top >= self._min_votes:
+                # 票数并列时取窗口内最早出现的，与 Counter(self._q).most_common 一致
+                return next(t for t in self._q if self._counts[t] == top)
             return self._q[-1]
         # 相似投票：与某代表相似度 >= threshold 的算同一段，取票数最高且 >= min_votes 的代表
         best_count = 0
         best_representative: Optional[str] = None
-        seen: set = set()
-        for candidate in self._q:
-            if candidate in seen:
-                continue
-            count = sum(
-                1 for t in self._q
-                if text_similarity(candidate, t) >= self._similarity_vote
-            )
+        uniq, votes, _ = self._similar_counts()
+        for candidate, count in zip(uniq, votes):
             if count >= self._min_votes and count > best_count:
                 best_count = count
                 best_representative = candidate
-            seen.add(candidate)
         if best_representative is not None:
             return best_representative
         return self._q[-1]
@@ -79,19 +181,9 @@ class OCRDebouncer:
         if not self._q:
             return False
         if self._similarity_vote <= 0:
-            from collections import Counter
-            c = Counter(self._q)
-            most_common = c.most_common(1)
-            return bool(most_common and most_common[0][1] >= self._min_votes)
-        best_count = 0
-        for candidate in self._q:
-            count = sum(
-                1 for t in self._q
-                if text_similarity(candidate, t) >= self._similarity_vote
-            )
-            if count > best_count:
-                best_count = count
-        return best_count >= self._min_votes
+            return max(self._counts.values()) >= self._min_votes
+        _, votes, _ = self._similar_counts()
+        return max(votes) >= self._min_votes
 
     def is_soft_stable(self, similarity_threshold: float = 0.85) -> bool:
         """
@@ -102,4 +194,9 @@ class OCRDebouncer:
             return False
         stable = self.get_stable()
         last = self._q[-1]
-        return text_similarity(stable, last) >= similarity_threshold
+        if stable == last:
+            return 1.0 >= similarity_threshold
+        cached = self._vote_cache[2].get((stable, last)) if self._vote_cache is not None else None
+        if cached is not None:
+            return cached >= similarity_threshold
+        return text_similarity(stable, last, similarity_threshold) >= similarity_threshold
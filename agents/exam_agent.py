@@ -10,20 +10,20 @@ import time
 from typing import Optional, Tuple
 
 import config
+from agents._llm_client import make_client
 
 _ROOT_DIR = getattr(config, "_ROOT_DIR", None) or os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 
 
 def _get_client_and_model():
-    from openai import OpenAI
     use_openai = getattr(config, "LLM_USE_OPENAI", False)
-    api_key = getattr(config, "OPENAI_API_KEY", "") or os.environ.get("OPENAI_API_KEY", "")
+    api_key = (getattr(config, "OPENAI_API_KEY", "") or os.environ.get("OPENAI_API_KEY", "")) if use_openai else ""
     if use_openai and api_key:
-        client = OpenAI(api_key=api_key)
+        client = make_client(None, api_key)
         model = (getattr(config, "LLM_MODEL", "") or "gpt-4o-mini").strip()
         return client, model
     base_url = getattr(config, "LLM_BASE_URL", "http://127.0.0.1:1234/v1")
-    client = OpenAI(base_url=base_url, api_key="lm-studio")
+    client = make_client(base_url, "lm-studio")
     model = (getattr(config, "LLM_MODEL", "") or "").strip()
     return client, model or "default"
 
@@ -116,11 +116,12 @@ def generate_exam_paper(
             pdf = FPDF()
             pdf.add_page()
             pdf.set_font("Helvetica", "", 11)
-            for line in paper_part.replace("\r", "").split("\n"):
-                try:
-                    pdf.multi_cell(0, 6, line)
-                except Exception:
-                    pdf.multi_cell(0, 6, line.encode("latin-1", "replace").decode("latin-1"))
+            # 整段一次 multi_cell（内嵌换行），不再逐行排版；核心字体编码失败时整体降级一次
+            body = paper_part.replace("\r", "")
+            try:
+                pdf.multi_cell(0, 6, body)
+            except Exception:
+                pdf.multi_cell(0, 6, body.encode("latin-1", "replace").decode("latin-1"))
             pdf.output(paper_path)
             with open(answer_key_path, "w", encoding="utf-8") as f:
                 f.write(answer_part or "（无答案）")
@@ -6,8 +6,10 @@
 from __future__ import annotations
 
 import os
+import stat
+import tempfile
 import threading
-from typing import Optional
+from typing import Dict, Optional, Tuple
 
 # 项目根目录（与 config 一致）
 _ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -15,6 +17,12 @@ _lock = threading.Lock()
 
 # 学情文件最大行数，超出只保留最近部分
 MAX_LINES = 200
+# 截断时从文件尾部倒序读取的块大小
+_TAIL_CHUNK = 64 * 1024
+# 各学情文件当前行数（首次追加时数一次，之后随追加累加），避免每次追加都整读文件
+_line_counts: Dict[str, int] = {}
+# 上次读取的学情摘要：((路径, mtime_ns, 大小, max_chars), 摘要)
+_summary_cache: Optional[Tuple[Tuple[str, int, int, int], str]] = None
 
 
 def _learning_file_path() -> str:
@@ -25,25 +33,96 @@ def _learning_file_path() -> str:
     return os.path.join(_ROOT_DIR, rel)
 
 
+def _count_lines(path: str) -> int:
+    """按块统计文件行数（与 readlines 一致：末行无换行也算一行）。"""
+    n = 0
+    last = b""
+    with open(path, "rb") as f:
+        while True:
+            buf = f.read(_TAIL_CHUNK)
+            if not buf:
+                break
+            n += buf.count(b"\n")
+            last = buf[-1:]
+    if last and last != b"\n":
+        n += 1
+    return n
+
+
+def _tail_offset(f, keep: int) -> int:
+    """返回保留最后 keep 行时的起始字节偏移：从文件尾部按块倒序找换行，不读整个文件。"""
+    f.seek(0, os.SEEK_END)
+    end = f.tell()
+    if end == 0:
+        return 0
+    f.seek(end - 1)
+    need = keep + 1 if f.read(1) == b"\n" else keep
+    pos = end
+    while pos > 0:
+        size = min(_TAIL_CHUNK, pos)
+        pos -= size
+        f.seek(pos)
+        buf = f.read(size)
+        i = len(buf)
+        while True:
+            i = buf.rfind(b"\n", 0, i)
+            if i == -1:
+                break
+            need -= 1
+            if need == 0:
+                return pos + i + 1
+    return 0
+
+
+def _trim_to_last_lines(path: str, keep: int) -> None:
+    """只保留最后 keep 行：把尾部写入同目录临时文件再 os.replace（原子替换）。"""
+    with open(path, "rb") as f:
+        offset = _tail_offset(f, keep)
+        if offset == 0:
+            return
+        f.seek(offset)
+        tail = f.read()
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path) or None, prefix=".learning_", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as out:
+            out.write(tail)
+        # mkstemp 建的文件是 0600：替换前沿用原文件权限，不让裁剪悄悄把学情文件改成仅属主可读
+        os.chmod(tmp, stat.S_IMODE(os.stat(path).st_mode))
+        os.replace(tmp, path)
+    except Exception:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
+
+
 def get_learning_summary_for_prompt(max_chars: int = 1200) -> str:
     """
     读取学情文件内容，供拼入助手的【长期记忆】。若文件不存在或为空则返回空字符串。
     """
+    global _summary_cache
     path = _learning_file_path()
     with _lock:
+        try:
+            st = os.stat(path)
+        except OSError:
+            return ""
+        # 每轮对话都会取摘要：文件未变（路径/mtime/大小相同）时直接复用上次结果，不重读文件
+        key = (path, st.st_mtime_ns, st.st_size, max_chars)
+        if _summary_cache is not None and _summary_cache[0] == key:
+            return _summary_cache[1]
         try:
             if not os.path.isfile(path):
                 return ""
             with open(path, "r", encoding="utf-8") as f:
-                lines = f.readlines()
-            text = "".join(lines).strip()
-            if not text:
-                return ""
-            if len(text) <= max_chars:
-                return text
-            return text[-max_chars:].strip()
+                text = f.read().strip()
+            if len(text) > max_chars:
+                text = text[-max_chars:].strip()
         except Exception:
             return ""
+        _summary_cache = (key, text)
+        return text
 
 
 def append_learning_record(content: str, prefix: str = "已学/已讲: ") -> bool:
@@ -60,14 +139,17 @@ def append_learning_record(content: str, prefix: str = "已学/已讲: ") -> boo
             if d and not os.path.isdir(d):
                 os.makedirs(d, exist_ok=True)
             line = (prefix or "") + content + "\n"
+            count = _line_counts.get(path)
+            if count is None or not os.path.isfile(path):
+                count = _count_lines(path) if os.path.isfile(path) else 0
             with open(path, "a", encoding="utf-8") as f:
                 f.write(line)
-            # 可选：限制行数，避免文件过大
-            with open(path, "r", encoding="utf-8") as f:
-                lines = f.readlines()
-            if len(lines) > MAX_LINES:
-                with open(path, "w", encoding="utf-8") as f:
-                    f.writelines(lines[-MAX_LINES:])
+            count += line.count("\n")
+            # 限制行数，避免文件过大：仅超限时才从尾部截断
+            if count > MAX_LINES:
+                _trim_to_last_lines(path, MAX_LINES)
+                count = MAX_LINES
+            _line_counts[path] = count
             return True
         except Exception:
             return False
@@ -6,14 +6,23 @@ LLM 严格纠错（Agent C）：仅拼写/错别字/标点/大小写/空格/法
 """
 from __future__ import annotations
 
+import functools
 import json
 import os
-import re
+import threading
 import time
 from dataclasses import dataclass
 from typing import Any, Dict, List, Optional
 
 import config
+from agents._llm_client import discover_model, invalidate_on_model_error, make_client
+
+# openai 的异常类型用于区分可重试错误；未安装时一律按可重试处理（与原行为一致）
+try:
+    from openai import APIConnectionError, APIStatusError, RateLimitError
+    _HAS_OPENAI_ERRORS = True
+except ImportError:
+    _HAS_OPENAI_ERRORS = False
 
 
 @dataclass
@@ -29,32 +38,73 @@ class LLMResult:
     language_hint: Optional[str] = None
 
 
+# 可选：orjson（C 实现，解析比标准库 json 快数倍）；未安装则用 json
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:
+    _json_loads = json.loads
+
+
+def _find_json_object(s: str, start: int = 0) -> Optional[tuple[int, int]]:
+    """
+    从 start 起找第一个括号配平的 {...}，返回 (起, 止+1)；单次前向扫描，跟踪字符串与转义，
+    避免贪婪正则在长回复上的回溯。找不到返回 None。
+    """
+    begin = s.find("{", start)
+    if begin == -1:
+        return None
+    depth = 0
+    in_str = False
+    escape = False
+    for i in range(begin, len(s)):
+        c = s[i]
+        if in_str:
+            if escape:
+                escape = False
+            elif c == "\\":
+                escape = True
+            elif c == '"':
+                in_str = False
+        elif c == '"':
+            in_str = True
+        elif c == "{":
+            depth += 1
+        elif c == "}":
+            depth -= 1
+            if depth == 0:
+                return begin, i + 1
+    return None
+
+
 # JSON 输出 schema 约束（用于校验）
 def _parse_strict_json(content: str) -> Optional[Dict[str, Any]]:
-    """从模型输出中提取 JSON 对象；允许前后有空白或少量杂文。"""
+    """从模型输出中提取 JSON 对象；允许前后有空白、```json 围栏或少量杂文。"""
     content = (content or "").strip()
     if not content:
         return None
     # 尝试直接解析
     try:
-        return json.loads(content)
-    except json.JSONDecodeError:
+        return _json_loads(content)
+    except ValueError:
         pass
-    # 尝试从 ```json ... ``` 或 { ... } 中抽取
-    for pattern in (r"```(?:json)?\s*(\{[\s\S]*?\})\s*```", r"(\{[\s\S]*\})"):
-        m = re.search(pattern, content)
-        if m:
-            try:
-                return json.loads(m.group(1))
-            except json.JSONDecodeError:
-                continue
-    # 找第一个 { 到最后一个 }
+    # 依次尝试每个括号配平的 {...}（含 ```json 围栏内的对象）
+    pos = 0
+    while True:
+        span = _find_json_object(content, pos)
+        if span is None:
+            break
+        try:
+            return _json_loads(content[span[0] : span[1]])
+        except ValueError:
+            pos = span[0] + 1
+    # 兜底：第一个 { 到最后一个 }（括号未配平但中间可解析的情况）
     start = content.find("{")
     end = content.rfind("}")
     if start != -1 and end != -1 and end > start:
         try:
-            return json.loads(content[start : end + 1])
-        except json.JSONDecodeError:
+            return _json_loads(content[start : end + 1])
+        except ValueError:
             pass
     return None
 
@@ -80,26 +130,60 @@ def _validate_and_extract(data: Dict[str, Any], input_text: str) -> tuple[str, O
 
 def _get_client_and_model() -> tuple[Any, str]:
     """返回 (OpenAI client, model_id)。根据 config 选择 OpenAI 或 LM Studio。"""
-    from openai import OpenAI
     use_openai = getattr(config, "LLM_USE_OPENAI", False)
-    api_key = getattr(config, "OPENAI_API_KEY", "") or os.environ.get("OPENAI_API_KEY", "")
+    api_key = (getattr(config, "OPENAI_API_KEY", "") or os.environ.get("OPENAI_API_KEY", "")) if use_openai else ""
     if use_openai and api_key:
-        client = OpenAI(api_key=api_key)  # 默认 base_url 为 OpenAI 官方
+        client = make_client(None, api_key)  # 默认 base_url 为 OpenAI 官方
         model = (getattr(config, "LLM_MODEL", None) or "").strip() or "gpt-4o-mini"
         return client, model
     base_url = getattr(config, "LLM_BASE_URL", "http://127.0.0.1:1234/v1")
-    client = OpenAI(base_url=base_url, api_key="lm-studio")
+    client = make_client(base_url, "lm-studio")
     model = getattr(config, "LLM_MODEL", None) or ""
     if not model:
-        try:
-            models = client.models.list(timeout=3)
-            if models.data and len(models.data) > 0:
-                model = models.data[0].id
-        except Exception:
-            pass
+        model = discover_model(client, base_url)
     return client, model or "default"
 
 
+_DEFAULT_USER_TEMPLATE = "请对以下文本做严格纠错，并只输出 JSON，不要解释：\n\n{text}"
+
+
+@functools.cache
+def _system_message() -> Dict[str, str]:
+    """系统消息每次请求都相同，只构造一次。"""
+    return {"role": "system", "content": config.STRICT_CORRECTION_SYSTEM}
+
+
+@functools.cache
+def _user_template_parts() -> Optional[tuple[str, str]]:
+    """
+    把用户模板按 {text} 拆成 (前缀, 后缀)，之后每次直接拼接，省去 str.format 的解析；
+    模板含其他花括号（如 {{ 转义）时返回 None，仍走 format。
+    """
+    template = getattr(config, "STRICT_CORRECTION_USER_TEMPLATE", _DEFAULT_USER_TEMPLATE)
+    prefix, sep, suffix = template.partition("{text}")
+    if not sep or any(c in prefix + suffix for c in "{}"):
+        return None
+    return prefix, suffix
+
+
+def _build_user_content(text: str) -> str:
+    parts = _user_template_parts()
+    if parts is None:
+        return getattr(config, "STRICT_CORRECTION_USER_TEMPLATE", _DEFAULT_USER_TEMPLATE).format(text=text)
+    return parts[0] + text + parts[1]
+
+
+def _is_retryable(exc: BaseException) -> bool:
+    """超时/连接错误/限流/5xx 可重试；401、400、上下文超长等 4xx 重试无意义，直接放弃。"""
+    if not _HAS_OPENAI_ERRORS:
+        return True
+    if isinstance(exc, (APIConnectionError, RateLimitError)):  # APITimeoutError 是 APIConnectionError 子类
+        return True
+    if isinstance(exc, APIStatusError):
+        return getattr(exc, "status_code", 500) >= 500
+    return True
+
+
 def _truncate_input(text: str, max_chars: int) -> str:
     if max_chars <= 0 or len(text) <= max_chars:
         return text
@@ -109,15 +193,12 @@ def _truncate_input(text: str, max_chars: int) -> str:
 def _call_once(
     client: Any,
     model: str,
-    user_content: str,
+    messages: List[Dict[str, str]],
 ) -> tuple[Optional[Dict[str, Any]], Optional[str]]:
-    """单次调用，返回 (parsed_json, error_msg)。"""
+    """单次调用，返回 (parsed_json, error_msg)。messages 由调用方在重试循环前构造一次。"""
     resp = client.chat.completions.create(
         model=model,
-        messages=[
-            {"role": "system", "content": config.STRICT_CORRECTION_SYSTEM},
-            {"role": "user", "content": user_content},
-        ],
+        messages=messages,
         max_tokens=getattr(config, "LLM_MAX_TOKENS", 512),
         temperature=getattr(config, "LLM_TEMPERATURE", 0.2),
         timeout=config.LLM_TIMEOUT_SEC,
@@ -129,10 +210,11 @@ def _call_once(
     return parsed, None
 
 
-def correct_with_llm(raw_text: str) -> LLMResult:
+def correct_with_llm(raw_text: str, cancel_event: Optional[threading.Event] = None) -> LLMResult:
     """
     严格纠错：只允许拼写/错别字/标点/大小写/空格/法语缩合；
     要求模型返回 JSON，解析得到 corrected；失败则降级返回原文。
+    cancel_event：重试等待期间若被 set（如画面已换成新的稳定文本），立即放弃并返回原文，error_msg="cancelled"。
     """
     text = (raw_text or "").strip()
     if not text:
@@ -140,11 +222,7 @@ def correct_with_llm(raw_text: str) -> LLMResult:
 
     max_chars = getattr(config, "LLM_INPUT_MAX_CHARS", 800)
     truncated = _truncate_input(text, max_chars)
-    user_content = getattr(
-        config,
-        "STRICT_CORRECTION_USER_TEMPLATE",
-        "请对以下文本做严格纠错，并只输出 JSON，不要解释：\n\n{text}",
-    ).format(text=truncated)
+    messages = [_system_message(), {"role": "user", "content": _build_user_content(truncated)}]
 
     t0 = time.perf_counter()
     retries = getattr(config, "LLM_RETRY_COUNT", 2)
@@ -156,7 +234,7 @@ def correct_with_llm(raw_text: str) -> LLMResult:
 
         for attempt in range(retries + 1):
             try:
-                parsed, parse_err = _call_once(client, model, user_content)
+                parsed, parse_err = _call_once(client, model, messages)
                 if parsed is not None:
                     corrected, confidence, language_hint, changes = _validate_and_extract(parsed, text)
                     elapsed_ms = (time.perf_counter() - t0) * 1000
@@ -172,8 +250,20 @@ def correct_with_llm(raw_text: str) -> LLMResult:
                 last_error = parse_err
             except Exception as e:
                 last_error = str(e)
+                invalidate_on_model_error(e)
+                if not _is_retryable(e):
+                    break
             if attempt < retries:
-                time.sleep(0.3 * (attempt + 1))
+                delay = 0.3 * (attempt + 1)
+                if cancel_event is None:
+                    time.sleep(delay)
+                elif cancel_event.wait(delay):
+                    return LLMResult(
+                        corrected_text=text,
+                        success=False,
+                        time_ms=(time.perf_counter() - t0) * 1000,
+                        error_msg="cancelled",
+                    )
 
         # 所有尝试后仍无合法 JSON：兜底返回原文
         elapsed_ms = (time.perf_counter() - t0) * 1000
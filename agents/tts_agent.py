@@ -7,21 +7,40 @@
 from __future__ import annotations
 
 import asyncio
+import functools
 import os
+import queue
+import re
+import secrets
+import shutil
+import subprocess
 import tempfile
 import threading
+import time
 import unicodedata
-from collections import deque
-from typing import Optional
+from collections import Counter, deque
+from typing import Dict, Optional, Tuple
 
 import config
+from agents.debounce import text_similarity
 
 # 避免重复朗读同一段文字
 _last_spoken_text: Optional[str] = None
 _lock = threading.Lock()
 
+# 朗读任务队列：固定数量的常驻 daemon 工作线程依次执行（默认 1 个，播放本就串行），
+# 不再每次 speak() 新建线程，也避免并发多个 edge-tts 请求
+_speak_queue: "queue.Queue[str]" = queue.Queue()
+_speak_workers_started = False
+_speak_workers_lock = threading.Lock()
+
 # 纠错结果去抖：仅当稳定（最近 N 次中至少 K 次相同/相似）后才朗读
-_corrected_history: deque = deque(maxlen=5)  # maxlen 取配置与默认的较大值，speak() 内按配置截断
+# maxlen 即配置的 N，由 deque 自动挤掉旧条目；配置变化时 speak() 内按新长度重建
+_corrected_history: deque = deque(maxlen=max(0, int(getattr(config, "TTS_DEBOUNCE_HISTORY_LEN", 3))))
+# 历史内文本对的相似度缓存：键为 (a, b) 原文，文本移出历史即删；阈值变化时整体清空。
+# 每次 speak() 只需算新文本相关的文本对，而不是整个 N² 矩阵
+_sim_cache: Dict[Tuple[str, str], float] = {}
+_sim_cache_th: Optional[float] = None
 
 # 语言检测：短文本可能不准，用种子保证可复现
 try:
@@ -31,6 +50,51 @@ try:
 except ImportError:
     _HAS_LANGDETECT = False
 
+# 可选：fastText 语言识别（C++ 实现，短文本更准）；模型首次检测时加载，失败则一直回退 langdetect
+try:
+    import fasttext
+    _HAS_FASTTEXT = True
+except ImportError:
+    _HAS_FASTTEXT = False
+_ft_model = None
+_ft_load_failed = False
+_ft_lock = threading.Lock()
+
+
+def _get_fasttext_model():
+    """懒加载 fastText LID 模型（只加载一次）；不可用时返回 None。"""
+    global _ft_model, _ft_load_failed
+    if _ft_model is not None or not _HAS_FASTTEXT or _ft_load_failed:
+        return _ft_model
+    with _ft_lock:
+        if _ft_model is None and not _ft_load_failed:
+            path = (getattr(config, "TTS_FASTTEXT_LID_PATH", "") or "").strip()
+            if path and not os.path.isabs(path):
+                root = getattr(config, "_ROOT_DIR", None) or os.path.dirname(os.path.dirname(os.path.abspath(config.__file__)))
+                path = os.path.join(root, path)
+            try:
+                if path and os.path.isfile(path):
+                    _ft_model = fasttext.load_model(path)
+            except Exception:
+                _ft_model = None
+            if _ft_model is None:
+                _ft_load_failed = True
+    return _ft_model
+
+
+# 法语特征字符（含大写），用于 _has_french_markers
+_FR_MARKER_RE = re.compile("[éèêëàâçîïôùûüœæ]", re.IGNORECASE)
+
+# 常见法语词（无重音形式），供 _looks_like_french_by_words 使用；模块级只建一次
+_FR_HINTS = frozenset((
+    "les", "des", "une", "est", "sont", "dans", "pour", "avec", "aux", "que", "qui",
+    "pas", "sur", "tout", "sous", "mais", "ces", "mes", "ses", "nos", "vos", "leur",
+    "ont", "fait", "plus", "bien", "très", "aussi", "comme", "être", "avoir", "se", "le", "la",
+    "ferment", "fermer", "determinants", "déterminants", "souverain", "souveraine",
+))
+# 分词时去掉的首尾标点
+_WORD_PUNCT = ".,;:?!\"'()"
+
 
 def _normalize_for_lang(text: str) -> str:
     """统一为 NFC，便于识别「e + 组合重音」等为 é。"""
@@ -42,41 +106,56 @@ def detect_language(text: str) -> str:
     识别文本主要语言，返回 'en' 或 'fr'。
     支持 config.TTS_FORCE_LANG 强制指定；有法语特征或常见法语词时优先判为法语。
     """
-    t = _normalize_for_lang(text or "")
-    if not t or len(t) < 2:
-        return getattr(config, "TTS_DEFAULT_LANG", "en")
+    # 强制语言时不看文本，连 NFC 规范化也省掉
     force = (getattr(config, "TTS_FORCE_LANG", "") or "").strip().lower()
     if force in ("fr", "en"):
         return force
+    t = _normalize_for_lang(text or "")
+    default = getattr(config, "TTS_DEFAULT_LANG", "en")
+    if not t or len(t) < 2:
+        return default
+    return _detect_language_cached(t, default)
+
+
+@functools.lru_cache(maxsize=128)
+def _detect_language_cached(t: str, default: str) -> str:
+    """
+    detect_language 的实际检测（t 已 NFC 规范化）。稳定后的同一段文字会被反复朗读/点播放，
+    按全文缓存结果，免去重复的 langdetect 计算；强制语言在调用前处理，默认语言是键的一部分，配置变化无需清缓存。
+    """
     # 先看是否有明显法语特征（重音、ç、œ、æ）
     if _has_french_markers(t):
         return "fr"
     # OCR 常丢失重音：看是否含常见法语词（无重音写法）
     if _looks_like_french_by_words(t):
         return "fr"
+    model = _get_fasttext_model()
+    if model is not None:
+        try:
+            labels, _ = model.predict(t.replace("\n", " "), k=1)
+            lang = labels[0].replace("__label__", "", 1) if labels else ""
+            if lang in ("en", "fr"):
+                return lang
+            return default
+        except Exception:
+            pass
     if not _HAS_LANGDETECT:
-        return _fallback_detect_language(t) or getattr(config, "TTS_DEFAULT_LANG", "en")
+        return _fallback_detect_language(t) or default
     try:
         lang = detect(t)
         if lang in ("en", "fr"):
             return lang
-        return getattr(config, "TTS_DEFAULT_LANG", "en")
+        return default
     except Exception:
-        return _fallback_detect_language(t) or getattr(config, "TTS_DEFAULT_LANG", "en")
+        return _fallback_detect_language(t) or default
 
 
 def _looks_like_french_by_words(text: str) -> bool:
     """无重音时根据常见法语词判断（OCR 常把 déterminants 识别成 determinants）。"""
     t = (text or "").lower()
-    words = set(w.strip(".,;:?!\"'()") for w in t.split() if len(w.strip(".,;:?!\"'()")) >= 2)
-    # 常见法语词（无重音形式），出现 2 个以上则倾向法语
-    french_hints = {
-        "les", "des", "une", "est", "sont", "dans", "pour", "avec", "aux", "que", "qui",
-        "pas", "sur", "tout", "sous", "mais", "ces", "mes", "ses", "nos", "vos", "leur",
-        "ont", "fait", "plus", "bien", "très", "aussi", "comme", "être", "avoir", "se", "le", "la",
-        "ferment", "fermer", "determinants", "déterminants", "souverain", "souveraine",
-    }
-    count = sum(1 for w in words if w in french_hints)
+    words = {w for w in (tok.strip(_WORD_PUNCT) for tok in t.split()) if len(w) >= 2}
+    # 出现 2 个以上常见法语词则倾向法语
+    count = len(words & _FR_HINTS)
     if count >= 2:
         return True
     # 单词但很典型（如整句 "les determinants se ferment" 里 les + des 等）
@@ -88,13 +167,8 @@ def _looks_like_french_by_words(text: str) -> bool:
 def _has_french_markers(text: str) -> bool:
     """文本中是否含有明显法语特征（重音、ç、œ、æ 等），有则优先当法语。先 NFC 规范化以便识别组合字符。"""
     t = _normalize_for_lang(text or "")
-    french_chars = "éèêëàâçîïôùûüœæ"
-    count = sum(1 for c in t if c.lower() in french_chars)
-    if count >= 1:
-        return True
-    if "ç" in t or "œ" in t.lower() or "æ" in t.lower():
-        return True
-    return False
+    # 正则在 C 里扫描，命中第一个即返回，不逐字符 lower()
+    return _FR_MARKER_RE.search(t) is not None
 
 
 def _fallback_detect_language(text: str) -> Optional[str]:
@@ -111,23 +185,50 @@ def get_voice_for_language(lang: str) -> str:
     return getattr(config, "TTS_VOICE_EN", "en-US-JennyNeural")
 
 
+def _cached_similarity(a: str, b: str, sim_th: float) -> float:
+    """（调用方持有 _lock）历史内两段文本的相似度，已算过的直接取缓存；完全相同直接 1.0。"""
+    if a == b:
+        return 1.0
+    key = (a, b)
+    r = _sim_cache.get(key)
+    if r is None:
+        # 传入阈值：长度差已决定不可能达标时 text_similarity 直接返回上界，结论不变
+        r = text_similarity(a, b, sim_th)
+        _sim_cache[key] = r
+    return r
+
+
+def _prune_sim_cache(sim_th: float) -> None:
+    """（调用方持有 _lock）删掉涉及已移出历史的文本的缓存项；阈值变了则全部作废。"""
+    global _sim_cache_th
+    if sim_th != _sim_cache_th:
+        _sim_cache.clear()
+        _sim_cache_th = sim_th
+        return
+    live = set(_corrected_history)
+    for key in [k for k in _sim_cache if k[0] not in live or k[1] not in live]:
+        del _sim_cache[key]
+
+
 def _get_stable_corrected() -> Optional[str]:
     """
     从纠错历史中取“稳定”文本：最近 N 次中至少 K 次相同或相似（>= similarity）则返回
     最后一次属于该稳定簇的原文（用于朗读）；否则返回 None。
     """
-    from agents.debounce import text_similarity
-
     history = list(_corrected_history)
     if not history:
         return None
-    n = getattr(config, "TTS_DEBOUNCE_HISTORY_LEN", 3)
     min_votes = getattr(config, "TTS_DEBOUNCE_MIN_VOTES", 2)
     sim_th = getattr(config, "TTS_DEBOUNCE_SIMILARITY", 0.92)
+    # 先按完全相同分组：只在不同文本之间算相似度，相同文本按出现次数加权
+    weights = Counter(history)
+    if len(weights) == 1:
+        # 稳态下历史全部相同，无需任何相似度计算
+        return history[-1] if len(history) >= min_votes else None
     best_count = 0
     best_representative = None
-    for t in history:
-        count = sum(1 for s in history if text_similarity(t, s) >= sim_th)
+    for t in weights:  # Counter 保持首次出现顺序，并列时与逐条遍历选中同一个代表
+        count = sum(w for s, w in weights.items() if _cached_similarity(t, s, sim_th) >= sim_th)
         if count >= min_votes and count > best_count:
             best_count = count
             best_representative = t
@@ -135,11 +236,32 @@ def _get_stable_corrected() -> Optional[str]:
         return None
     # 返回历史中最后一次与代表文本相似的原文（保留换行等）
     for i in range(len(history) - 1, -1, -1):
-        if text_similarity(history[i], best_representative) >= sim_th:
+        if _cached_similarity(history[i], best_representative, sim_th) >= sim_th:
             return history[i]
     return best_representative
 
 
+def _speak_worker() -> None:
+    while True:
+        text = _speak_queue.get()
+        try:
+            _do_speak(text)
+        except Exception:
+            pass
+
+
+def _submit_speak(text: str) -> None:
+    """把朗读任务放入队列；首次调用时启动 config.TTS_WORKERS 个工作线程。"""
+    global _speak_workers_started
+    if not _speak_workers_started:
+        with _speak_workers_lock:
+            if not _speak_workers_started:
+                for i in range(max(1, int(getattr(config, "TTS_WORKERS", 1)))):
+                    threading.Thread(target=_speak_worker, name=f"tts-{i}", daemon=True).start()
+                _speak_workers_started = True
+    _speak_queue.put(text)
+
+
 def speak_immediate(text: str) -> None:
     """
     立即朗读，不去抖。用于用户主动说「读一下」等指令时，直接读出当前文字。
@@ -149,7 +271,7 @@ def speak_immediate(text: str) -> None:
         return
     if not getattr(config, "ENABLE_TTS", True):
         return
-    threading.Thread(target=_do_speak, args=(t,), daemon=True).start()
+    _submit_speak(t)
 
 
 def speak(text: str) -> None:
@@ -162,19 +284,19 @@ def speak(text: str) -> None:
     if not t or len(t) > 2000:
         return
     with _lock:
+        n = max(0, int(getattr(config, "TTS_DEBOUNCE_HISTORY_LEN", 3)))
+        if _corrected_history.maxlen != n:
+            _corrected_history = deque(_corrected_history, maxlen=n)
         _corrected_history.append(t)
-        n = getattr(config, "TTS_DEBOUNCE_HISTORY_LEN", 3)
-        while len(_corrected_history) > n:
-            _corrected_history.popleft()
+        _prune_sim_cache(getattr(config, "TTS_DEBOUNCE_SIMILARITY", 0.92))
         stable = _get_stable_corrected()
         if stable is None:
             return
         if _last_spoken_text is not None and _last_spoken_text.strip():
-            from agents.debounce import text_similarity
             if text_similarity(stable, _last_spoken_text) >= getattr(config, "TTS_DEBOUNCE_SIMILARITY", 0.92):
                 return
         _last_spoken_text = stable
-    threading.Thread(target=_do_speak, args=(stable,), daemon=True).start()
+    _submit_speak(stable)
 
 
 def _do_speak(text: str) -> None:
@@ -190,6 +312,170 @@ def _do_speak(text: str) -> None:
             pass
 
 
+# 可选：miniaudio 边合成边解码播放（不落盘、不启动外部播放器），未安装则走“存 MP3 + 系统播放器”
+try:
+    import miniaudio
+    _HAS_MINIAUDIO = True
+except ImportError:
+    _HAS_MINIAUDIO = False
+
+# edge-tts 默认输出 24kHz 单声道 MP3
+_EDGE_TTS_SAMPLE_RATE = 24000
+
+# edge-tts 协程统一跑在一个常驻事件循环线程里，避免每次朗读都 asyncio.run() 新建/销毁事件循环
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_loop_lock = threading.Lock()
+# 单次合成的最长等待（秒），超时取消协程
+_TTS_SYNTH_TIMEOUT_SEC = 60.0
+
+
+def _get_loop() -> asyncio.AbstractEventLoop:
+    """懒启动常驻事件循环（daemon 线程）。"""
+    global _loop
+    if _loop is not None:
+        return _loop
+    with _loop_lock:
+        if _loop is None:
+            loop = asyncio.new_event_loop()
+            threading.Thread(target=loop.run_forever, name="tts-loop", daemon=True).start()
+            _loop = loop
+    return _loop
+
+
+def _run_async(coro) -> None:
+    """在常驻事件循环上执行协程并等待完成；超时则取消并抛出。"""
+    fut = asyncio.run_coroutine_threadsafe(coro, _get_loop())
+    try:
+        fut.result(timeout=_TTS_SYNTH_TIMEOUT_SEC)
+    except BaseException:
+        fut.cancel()
+        raise
+
+
+if _HAS_MINIAUDIO:
+
+    class _ChunkQueueSource(miniaudio.StreamableSource):
+        """
+        把 edge-tts 陆续到达的 MP3 分片交给 miniaudio 解码器：数据不够时等待，合成结束后读尽即 EOF。
+        解码在 TTS 工作线程里进行（不在音频回调里），可以等；超过 deadline（monotonic）仍没数据按结束处理。
+        """
+
+        def __init__(self, deadline: float) -> None:
+            self._buf = bytearray()
+            self._eof = False
+            self._cond = threading.Condition()
+            self._deadline = deadline
+
+        def feed(self, data: bytes) -> None:
+            with self._cond:
+                self._buf += data
+                self._cond.notify_all()
+
+        def finish(self) -> None:
+            with self._cond:
+                self._eof = True
+                self._cond.notify_all()
+
+        def read(self, num_bytes: int) -> bytes:
+            # 凑够 num_bytes 再返回，避免把半个 MP3 帧交给解码器；网络卡到截止时间按结束处理
+            with self._cond:
+                while len(self._buf) < num_bytes and not self._eof:
+                    left = self._deadline - time.monotonic()
+                    if left <= 0 or not self._cond.wait(timeout=left):
+                        self._eof = True
+                out = bytes(self._buf[:num_bytes])
+                del self._buf[:num_bytes]
+                return out
+
+    class _PcmBuffer:
+        """解码出的 16 位单声道 PCM：TTS 线程写入，播放回调取走；数据不够时补静音，回调里从不等待。"""
+
+        def __init__(self) -> None:
+            self._buf = bytearray()
+            self._ended = False
+            self._lock = threading.Lock()
+            # 播放生成器退出（播完、出错或被丢弃）时置位
+            self.drained = threading.Event()
+
+        def feed(self, samples) -> None:
+            with self._lock:
+                self._buf += samples
+
+        def end(self) -> None:
+            with self._lock:
+                self._ended = True
+
+        def pending_sec(self) -> float:
+            with self._lock:
+                return len(self._buf) / (2.0 * _EDGE_TTS_SAMPLE_RATE)
+
+        def playback(self):
+            """PlaybackDevice 用的生成器（需先 next() 预激）：每次按设备要的帧数返回，解码结束且取尽后结束。"""
+            try:
+                framecount = yield b""
+                while True:
+                    want = framecount * 2
+                    with self._lock:
+                        out = bytes(self._buf[:want])
+                        del self._buf[:want]
+                        ended = self._ended
+                    if len(out) < want:
+                        if ended:
+                            if not out:
+                                return
+                        else:
+                            out += bytes(want - len(out))  # 网络/解码跟不上：补静音
+                    framecount = yield out
+            finally:
+                self.drained.set()
+
+
+def _stream_edge_tts(communicate) -> None:
+    """
+    边收 edge-tts 音频分片边解码播放（miniaudio），首帧到达即出声。
+    解码在本线程进行，音频回调只从 PCM 缓冲取数据（不够补静音）；整段受 _TTS_SYNTH_TIMEOUT_SEC 限制，不会无限等待。
+    解码器初始化失败（如无数据、无音频设备）时抛出，由调用方回退到文件播放；开始播放后的错误只会让朗读提前结束。
+    """
+    source = _ChunkQueueSource(time.monotonic() + _TTS_SYNTH_TIMEOUT_SEC)
+
+    async def _pump() -> None:
+        try:
+            async for chunk in communicate.stream():
+                if chunk.get("type") == "audio":
+                    source.feed(chunk["data"])
+        finally:
+            source.finish()
+
+    pump = asyncio.run_coroutine_threadsafe(_pump(), _get_loop())
+    try:
+        try:
+            decoded = miniaudio.stream_any(
+                source, miniaudio.FileFormat.MP3, nchannels=1, sample_rate=_EDGE_TTS_SAMPLE_RATE
+            )
+            first = next(decoded)  # stream_any 已跳过空占位块，这里是第一段真实 PCM，需保留
+            pcm = _PcmBuffer()
+            pcm.feed(first)
+            playback = pcm.playback()
+            next(playback)
+            device = miniaudio.PlaybackDevice(nchannels=1, sample_rate=_EDGE_TTS_SAMPLE_RATE)
+        except StopIteration:
+            raise RuntimeError("edge-tts 未返回音频")
+        with device:
+            device.start(playback)
+            try:
+                for samples in decoded:
+                    pcm.feed(samples)
+            except Exception:
+                pass
+            finally:
+                pcm.end()
+            # 等缓冲播完：剩余时长 + 余量；设备卡住也不无限等，随后停止设备
+            pcm.drained.wait(timeout=pcm.pending_sec() + 2.0)
+            device.stop()
+    finally:
+        pump.cancel()
+
+
 def _tts_dir() -> str:
     """朗读音频存放目录（对话框内嵌播放用），默认项目下 logs/tts。"""
     root = getattr(config, "_ROOT_DIR", None) or os.path.dirname(os.path.dirname(os.path.abspath(config.__file__)))
@@ -201,6 +487,33 @@ def _tts_dir() -> str:
     return d
 
 
+# generate_tts_file 生成的文件（旧 → 新），超出 maxlen 时删最旧的；首次使用时扫描一次目录接上历史文件
+_TTS_KEEP_FILES = 10
+_tts_files: deque = deque(maxlen=_TTS_KEEP_FILES)
+_tts_files_seeded = False
+_tts_files_lock = threading.Lock()
+
+
+def _seed_tts_files(out_dir: str, new_path: str) -> None:
+    """（调用方持有 _tts_files_lock）首次调用时把目录里已有的 tts_*.mp3（不含刚生成的 new_path）按修改时间入队，多余的删掉。"""
+    global _tts_files_seeded
+    if _tts_files_seeded:
+        return
+    _tts_files_seeded = True
+    try:
+        files = [os.path.join(out_dir, f) for f in os.listdir(out_dir) if f.startswith("tts_") and f.endswith(".mp3")]
+        files = [f for f in files if f != new_path]
+        files.sort(key=os.path.getmtime)
+    except Exception:
+        return
+    for f in files[:-_TTS_KEEP_FILES]:
+        try:
+            os.unlink(f)
+        except Exception:
+            pass
+    _tts_files.extend(files[-_TTS_KEEP_FILES:])
+
+
 def generate_tts_file(text: str, lang_detect_text: Optional[str] = None) -> Optional[str]:
     """
     仅生成朗读音频文件并返回路径，不调用系统播放器。用于对话框内嵌「🔊 播放」。
@@ -218,39 +531,44 @@ def generate_tts_file(text: str, lang_detect_text: Optional[str] = None) -> Opti
     voice = get_voice_for_language(lang)
     rate = getattr(config, "TTS_RATE", "+0%")
     communicate = edge_tts.Communicate(t, voice, rate=rate)
-    import time as _time
-    name = f"tts_{_time.strftime('%Y%m%d_%H%M%S')}_{id(t) % 100000}.mp3"
+    # 随机后缀：id(t) 在短命字符串间常被复用，同一秒内连点会撞名并覆盖正在播放的文件
+    name = f"tts_{time.strftime('%Y%m%d_%H%M%S')}_{secrets.token_hex(3)}.mp3"
     out_dir = _tts_dir()
     path = os.path.join(out_dir, name)
     try:
-        asyncio.run(communicate.save(path))
+        _run_async(communicate.save(path))
     except Exception:
         return None
-    # 保留最近 N 个文件，删更早的
-    try:
-        files = [os.path.join(out_dir, f) for f in os.listdir(out_dir) if f.startswith("tts_") and f.endswith(".mp3")]
-        files.sort(key=os.path.getmtime)
-        for f in files[:-10]:
-            try:
-                os.unlink(f)
-            except Exception:
-                pass
-    except Exception:
-        pass
+    # 保留最近 N 个文件：新文件入队，被挤出队列的那个删掉
+    with _tts_files_lock:
+        _seed_tts_files(out_dir, path)
+        evicted = _tts_files[0] if len(_tts_files) == _tts_files.maxlen else None
+        _tts_files.append(path)
+    if evicted and evicted != path:
+        try:
+            os.unlink(evicted)
+        except Exception:
+            pass
     return path
 
 
 def _speak_edge_tts(text: str, voice: str) -> None:
-    """使用 edge-tts（微软神经语音）。"""
+    """使用 edge-tts（微软神经语音）：装了 miniaudio 时边合成边播放，否则存 MP3 后用系统播放器打开。"""
     try:
         import edge_tts
     except ImportError:
         raise ImportError("edge-tts not installed")
     rate = getattr(config, "TTS_RATE", "+0%")
+    if _HAS_MINIAUDIO and getattr(config, "TTS_STREAM_PLAYBACK", True):
+        try:
+            _stream_edge_tts(edge_tts.Communicate(text, voice, rate=rate))
+            return
+        except Exception:
+            pass  # 流式播放不可用时回退到存文件 + 系统播放器
     communicate = edge_tts.Communicate(text, voice, rate=rate)
     tmp = tempfile.NamedTemporaryFile(suffix=".mp3", delete=False)
     try:
-        asyncio.run(communicate.save(tmp.name))
+        _run_async(communicate.save(tmp.name))
         tmp.close()
         _play_audio(tmp.name)
         def _del_later():
@@ -259,7 +577,9 @@ def _speak_edge_tts(text: str, voice: str) -> None:
                     os.unlink(tmp.name)
             except Exception:
                 pass
-        threading.Timer(30.0, _del_later).start()
+        # 30 秒后删除：挂在常驻事件循环上定时执行，不再为每次朗读起一个 sleep 线程
+        loop = _get_loop()
+        loop.call_soon_threadsafe(loop.call_later, 30.0, _del_later)
     except Exception:
         try:
             os.unlink(tmp.name)
@@ -267,14 +587,91 @@ def _speak_edge_tts(text: str, voice: str) -> None:
             pass
 
 
+# 非 Windows：有 ffplay 时保持一个常驻 ffplay 进程，MP3 字节直接写入其 stdin 依次播放，
+# 不再每句都 fork xdg-open 再由桌面环境解析默认播放器
+_player: Optional[subprocess.Popen] = None
+_player_lock = threading.Lock()
+_FFPLAY = shutil.which("ffplay") if os.name != "nt" else None
+
+
+def _get_player() -> subprocess.Popen:
+    """（调用方持有 _player_lock）返回存活的 ffplay 进程，已退出则重启。"""
+    global _player
+    if _player is None or _player.poll() is not None:
+        _player = subprocess.Popen(
+            [_FFPLAY, "-nodisp", "-loglevel", "quiet", "-f", "mp3", "-i", "pipe:0"],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+    return _player
+
+
+def _stop_player(graceful: bool = False) -> None:
+    """
+    （调用方持有 _player_lock）关闭常驻 ffplay：先关 stdin，graceful 时给它 1 秒播完退出，否则直接 kill；
+    随后 wait 回收进程（不留僵尸），并把 _player 置 None，下次 _get_player 必定新起一个。
+    """
+    global _player
+    player, _player = _player, None
+    if player is None:
+        return
+    try:
+        player.stdin.close()
+    except Exception:
+        pass
+    try:
+        if graceful:
+            try:
+                player.wait(timeout=1)
+                return
+            except subprocess.TimeoutExpired:
+                pass
+        player.kill()
+        player.wait(timeout=1)
+    except Exception:
+        pass
+
+
+def shutdown_player() -> None:
+    """程序退出时调用：关闭并回收常驻 ffplay。"""
+    with _player_lock:
+        _stop_player(graceful=True)
+
+
+def _pipe_to_player(path: str) -> bool:
+    """把 MP3 文件内容写入常驻 ffplay；管道断开时重启重试一次。失败返回 False。"""
+    with open(path, "rb") as f:
+        data = f.read()
+    with _player_lock:
+        for _ in range(2):
+            try:
+                player = _get_player()
+                player.stdin.write(data)
+                player.stdin.flush()
+                return True
+            except (BrokenPipeError, OSError, ValueError):
+                # 管道已断：回收旧进程并清空引用，重试时一定写到新起的 ffplay
+                _stop_player()
+    return False
+
+
 def _play_audio(path: str) -> None:
-    """播放音频：Windows 用系统默认播放器。"""
+    """播放音频：Windows 用系统默认播放器；其他系统优先常驻 ffplay，没有则 xdg-open。"""
     try:
         if os.name == "nt":
             os.startfile(path)
+        elif _FFPLAY and _pipe_to_player(path):
+            return
         else:
-            import subprocess
-            subprocess.run(["xdg-open", path], check=False, timeout=2)
+            # 不等待 xdg-open 返回（桌面负载高时可能卡住），避免朗读工作线程被阻塞
+            subprocess.Popen(
+                ["xdg-open", path],
+                stdin=subprocess.DEVNULL,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+                close_fds=True,
+            )
     except Exception:
         pass
 
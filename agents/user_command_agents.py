@@ -7,34 +7,81 @@
 from __future__ import annotations
 
 import os
+import threading
 import time
-from typing import Optional
+from typing import Dict, Optional, Tuple
 
 import config
+from agents._llm_client import discover_model, invalidate_on_model_error, make_client
 
 
 def _get_client_and_model():
     """与 llm_correct 一致的 client/model。"""
-    from openai import OpenAI
     use_openai = getattr(config, "LLM_USE_OPENAI", False)
-    api_key = getattr(config, "OPENAI_API_KEY", "") or os.environ.get("OPENAI_API_KEY", "")
+    api_key = (getattr(config, "OPENAI_API_KEY", "") or os.environ.get("OPENAI_API_KEY", "")) if use_openai else ""
     if use_openai and api_key:
-        client = OpenAI(api_key=api_key)
+        client = make_client(None, api_key)
         model = (getattr(config, "LLM_MODEL", None) or "").strip() or "gpt-4o-mini"
         return client, model
     base_url = getattr(config, "LLM_BASE_URL", "http://127.0.0.1:1234/v1")
-    client = OpenAI(base_url=base_url, api_key="lm-studio")
+    client = make_client(base_url, "lm-studio")
     model = getattr(config, "LLM_MODEL", None) or ""
     if not model:
-        try:
-            models = client.models.list(timeout=3)
-            if models.data and len(models.data) > 0:
-                model = models.data[0].id
-        except Exception:
-            pass
+        model = discover_model(client, base_url)
     return client, model or "default"
 
 
+# 系统提示固定不变：模块级只建一次，每次请求的 system 前缀逐字节相同（服务端 prompt 前缀缓存可复用）
+_TARGET_NAMES = {"zh": "简体中文", "en": "英文"}
+_SYS_TRANSLATE = {
+    target: {"role": "system", "content": f"你只做翻译。把用户给的一段文字翻译成{name}，只输出译文，不要解释、不要序号。"}
+    for target, name in _TARGET_NAMES.items()
+}
+_SYS_PRONOUNCE = {
+    "role": "system",
+    "content": "你只输出读音。规则：中文用拼音标注（可带声调）；英文/法文用音标或简明发音说明。只输出读音本身，不要解释、不要例句。多词/多字用空格分隔。",
+}
+_SYS_EXAMPLES = {
+    "role": "system",
+    "content": "你只输出例句。根据用户给的词或短语，给出 1～2 个简短例句（可中英混合）。每句一行，不要编号外的解释。",
+}
+
+
+# 指令结果缓存：同一内容重复按 T/P/E 直接返回上次结果；有效期按指令取 config.LLM_CACHE_TTL，为 0 则不缓存
+_CMD_CACHE_MAX = 64
+_cmd_cache: Dict[Tuple[str, str], Tuple[float, str]] = {}
+_cmd_cache_lock = threading.Lock()
+
+
+def _cmd_ttl(intent: str) -> float:
+    ttl_map = getattr(config, "LLM_CACHE_TTL", None) or {}
+    return float(ttl_map.get(intent, getattr(config, "LLM_CACHE_TTL_SEC", 600)))
+
+
+def _get_cached(intent: str, key: str) -> Optional[str]:
+    ttl = _cmd_ttl(intent)
+    if ttl <= 0:
+        return None
+    with _cmd_cache_lock:
+        hit = _cmd_cache.get((intent, key))
+        if hit is None:
+            return None
+        if time.monotonic() - hit[0] >= ttl:
+            del _cmd_cache[(intent, key)]
+            return None
+        return hit[1]
+
+
+def _put_cached(intent: str, key: str, out: str) -> None:
+    if _cmd_ttl(intent) <= 0:
+        return
+    with _cmd_cache_lock:
+        _cmd_cache.pop((intent, key), None)
+        while len(_cmd_cache) >= _CMD_CACHE_MAX:
+            del _cmd_cache[next(iter(_cmd_cache))]  # 按写入顺序淘汰最早一条
+        _cmd_cache[(intent, key)] = (time.monotonic(), out)
+
+
 def _truncate(text: str, max_chars: int) -> str:
     if max_chars <= 0 or len(text) <= max_chars:
         return text
@@ -46,9 +93,12 @@ def translate_with_llm(text: str) -> str:
     text = _truncate((text or "").strip(), getattr(config, "USER_CMD_INPUT_MAX_CHARS", 400))
     if not text:
         return "(无内容)"
-    target = getattr(config, "USER_CMD_TRANSLATE_TARGET", "zh")
-    target_name = "简体中文" if target == "zh" else "英文"
-    sys_msg = f"你只做翻译。把用户给的一段文字翻译成{target_name}，只输出译文，不要解释、不要序号。"
+    target = "zh" if getattr(config, "USER_CMD_TRANSLATE_TARGET", "zh") == "zh" else "en"
+    cache_key = f"{target}|{text}"
+    cached = _get_cached("translate", cache_key)
+    if cached is not None:
+        return cached
+    target_name = _TARGET_NAMES[target]
     user_msg = f"请将以下内容翻译成{target_name}：\n\n{text}"
     try:
         client, model = _get_client_and_model()
@@ -56,14 +106,18 @@ def translate_with_llm(text: str) -> str:
         timeout = getattr(config, "USER_CMD_LLM_TIMEOUT_SEC", 20)
         resp = client.chat.completions.create(
             model=model,
-            messages=[{"role": "system", "content": sys_msg}, {"role": "user", "content": user_msg}],
+            messages=[_SYS_TRANSLATE[target], {"role": "user", "content": user_msg}],
             max_tokens=getattr(config, "USER_CMD_MAX_TOKENS", 350),
             temperature=0.2,
             timeout=timeout,
         )
         out = (resp.choices[0].message.content or "").strip()
-        return out or "(翻译无输出)"
+        if not out:
+            return "(翻译无输出)"
+        _put_cached("translate", cache_key, out)
+        return out
     except Exception as e:
+        invalidate_on_model_error(e)
         return f"(翻译失败: {str(e)[:80]})"
 
 
@@ -72,21 +126,27 @@ def pronunciation_with_llm(text: str) -> str:
     text = _truncate((text or "").strip(), getattr(config, "USER_CMD_INPUT_MAX_CHARS", 400))
     if not text:
         return "(无内容)"
-    sys_msg = "你只输出读音。规则：中文用拼音标注（可带声调）；英文/法文用音标或简明发音说明。只输出读音本身，不要解释、不要例句。多词/多字用空格分隔。"
+    cached = _get_cached("pronounce", text)
+    if cached is not None:
+        return cached
     user_msg = f"请给出以下内容的读音：\n\n{text}"
     try:
         client, model = _get_client_and_model()
         timeout = getattr(config, "USER_CMD_LLM_TIMEOUT_SEC", 20)
         resp = client.chat.completions.create(
             model=model,
-            messages=[{"role": "system", "content": sys_msg}, {"role": "user", "content": user_msg}],
+            messages=[_SYS_PRONOUNCE, {"role": "user", "content": user_msg}],
             max_tokens=getattr(config, "USER_CMD_MAX_TOKENS", 350),
             temperature=0.1,
             timeout=timeout,
         )
         out = (resp.choices[0].message.content or "").strip()
-        return out or "(读音无输出)"
+        if not out:
+            return "(读音无输出)"
+        _put_cached("pronounce", text, out)
+        return out
     except Exception as e:
+        invalidate_on_model_error(e)
         return f"(读音失败: {str(e)[:80]})"
 
 
@@ -95,19 +155,25 @@ def examples_with_llm(text: str) -> str:
     text = _truncate((text or "").strip(), getattr(config, "USER_CMD_INPUT_MAX_CHARS", 400))
     if not text:
         return "(无内容)"
-    sys_msg = "你只输出例句。根据用户给的词或短语，给出 1～2 个简短例句（可中英混合）。每句一行，不要编号外的解释。"
+    cached = _get_cached("examples", text)
+    if cached is not None:
+        return cached
     user_msg = f"请为以下内容给出 1～2 个例句：\n\n{text}"
     try:
         client, model = _get_client_and_model()
         timeout = getattr(config, "USER_CMD_LLM_TIMEOUT_SEC", 20)
         resp = client.chat.completions.create(
             model=model,
-            messages=[{"role": "system", "content": sys_msg}, {"role": "user", "content": user_msg}],
+            messages=[_SYS_EXAMPLES, {"role": "user", "content": user_msg}],
             max_tokens=getattr(config, "USER_CMD_MAX_TOKENS", 350),
             temperature=0.3,
             timeout=timeout,
         )
         out = (resp.choices[0].message.content or "").strip()
-        return out or "(例句无输出)"
+        if not out:
+            return "(例句无输出)"
+        _put_cached("examples", text, out)
+        return out
     except Exception as e:
+        invalidate_on_model_error(e)
         return f"(例句失败: {str(e)[:80]})"
@@ -15,27 +15,22 @@ import cv2  # type: ignore[import-untyped]
 import numpy as np
 
 import config
+from agents._llm_client import discover_model, invalidate_on_model_error, make_client
 
 
 def _get_client_and_model():
     """与 llm_correct 一致；视觉模型名可用 VISION_LLM_MODEL 覆盖。"""
-    from openai import OpenAI
     use_openai = getattr(config, "LLM_USE_OPENAI", False)
-    api_key = getattr(config, "OPENAI_API_KEY", "") or os.environ.get("OPENAI_API_KEY", "")
+    api_key = (getattr(config, "OPENAI_API_KEY", "") or os.environ.get("OPENAI_API_KEY", "")) if use_openai else ""
     if use_openai and api_key:
-        client = OpenAI(api_key=api_key)
+        client = make_client(None, api_key)
         model = (getattr(config, "VISION_LLM_MODEL", None) or getattr(config, "LLM_MODEL", "") or "gpt-4o").strip()
         return client, model
     base_url = getattr(config, "LLM_BASE_URL", "http://127.0.0.1:1234/v1")
-    client = OpenAI(base_url=base_url, api_key="lm-studio")
+    client = make_client(base_url, "lm-studio")
     model = getattr(config, "VISION_LLM_MODEL", None) or getattr(config, "LLM_MODEL", "") or ""
     if not model:
-        try:
-            models = client.models.list(timeout=3)
-            if models.data and len(models.data) > 0:
-                model = models.data[0].id
-        except Exception:
-            pass
+        model = discover_model(client, base_url)
     return client, model or "default"
 
 
@@ -45,12 +40,14 @@ def _resize_if_needed(img_bgr: np.ndarray, max_long_edge: int) -> np.ndarray:
         return img_bgr
     scale = max_long_edge / max(h, w)
     nw, nh = int(w * scale), int(h * scale)
-    return cv2.resize(img_bgr, (nw, nh), interpolation=cv2.INTER_LINEAR)
+    # 缩小用 INTER_AREA：按面积取平均，文字笔画不易出现锯齿/摩尔纹
+    return cv2.resize(img_bgr, (nw, nh), interpolation=cv2.INTER_AREA)
 
 
 def _encode_image_to_base64_jpeg(img_bgr: np.ndarray, quality: int = 85) -> str:
     _, buf = cv2.imencode(".jpg", img_bgr, [cv2.IMWRITE_JPEG_QUALITY, quality])
-    return base64.b64encode(buf.tobytes()).decode("ascii")
+    # 直接对编码缓冲区做 base64（支持 buffer 协议），省去 tobytes() 的整份拷贝
+    return base64.b64encode(memoryview(buf)).decode("ascii")
 
 
 def extract_text_from_image(img_bgr: np.ndarray) -> str:
@@ -61,7 +58,11 @@ def extract_text_from_image(img_bgr: np.ndarray) -> str:
     if img_bgr is None or img_bgr.size == 0:
         return ""
     max_edge = getattr(config, "VISION_LLM_MAX_LONG_EDGE", 1024)
-    img = _resize_if_needed(img_bgr, max_edge)
+    img = img_bgr
+    if getattr(config, "VISION_LLM_GRAYSCALE", True) and img.ndim == 3 and img.shape[2] == 3:
+        # 先转灰度再缩放，缩放只需处理单通道；单通道 JPEG 各视觉模型均可读取
+        img = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+    img = _resize_if_needed(img, max_edge)
     b64 = _encode_image_to_base64_jpeg(img)
     data_uri = f"data:image/jpeg;base64,{b64}"
 
@@ -88,6 +89,7 @@ def extract_text_from_image(img_bgr: np.ndarray) -> str:
         out = (resp.choices[0].message.content or "").strip()
         return out or "(视觉模型未返回文字)"
     except Exception as e:
+        invalidate_on_model_error(e)
         return f"(视觉模型错误: {str(e)[:100]})"
 
 
@@ -102,15 +104,12 @@ def merge_ocr_and_vision_with_llm(ocr_text: str, vision_text: str) -> str:
     if not ocr_text:
         return vision_text.strip()
     try:
-        from openai import OpenAI
         use_openai = getattr(config, "LLM_USE_OPENAI", False)
-        api_key = getattr(config, "OPENAI_API_KEY", "") or os.environ.get("OPENAI_API_KEY", "")
+        api_key = (getattr(config, "OPENAI_API_KEY", "") or os.environ.get("OPENAI_API_KEY", "")) if use_openai else ""
         if use_openai and api_key:
-            client = OpenAI(api_key=api_key)
-            base_url = None
+            client = make_client(None, api_key)
         else:
-            base_url = getattr(config, "LLM_BASE_URL", "http://127.0.0.1:1234/v1")
-            client = OpenAI(base_url=base_url, api_key="lm-studio")
+            client = make_client(getattr(config, "LLM_BASE_URL", "http://127.0.0.1:1234/v1"), "lm-studio")
         model = getattr(config, "LLM_MODEL", "") or ""
         sys_msg = "You are a text merger. Given two versions of text extracted from the same image (OCR and vision model), output a single best version: fix obvious errors, remove duplicates, keep all meaningful content. Output only the merged text, no explanation."
         user_msg = f"OCR result:\n{ocr_text}\n\nVision result:\n{vision_text}"
@@ -5,54 +5,60 @@
 """
 from __future__ import annotations
 
+import functools
 import os
 import re
+import time
 from typing import Callable, List, Optional, Tuple
 
 import config
+from agents._llm_client import (
+    discover_model,
+    invalidate_model_cache,  # noqa: F401  保留本模块原有的公开接口
+    invalidate_on_model_error,
+    make_client,
+)
+
+# [ACTION:xxx] 标签：每条回复都要解析/去除，模块级预编译一次
+_ACTION_RE = re.compile(r"\[ACTION:\s*(\w+)\]", re.IGNORECASE)
+_ACTION_STRIP_RE = re.compile(r"\s*\[ACTION:\s*\w+\]\s*")
+
+
+@functools.lru_cache(maxsize=8)
+def _is_thinking_model(model: str) -> bool:
+    """thinking 类模型输出慢，需加长超时；按模型名缓存判定，配置仍在调用时读取。"""
+    return "thinking" in model.lower()
 
 
 def _get_client_and_model():
     """与 llm_correct 一致，使用本地/云端 LLM。"""
-    from openai import OpenAI
     use_openai = getattr(config, "LLM_USE_OPENAI", False)
-    api_key = getattr(config, "OPENAI_API_KEY", "") or os.environ.get("OPENAI_API_KEY", "")
+    api_key = (getattr(config, "OPENAI_API_KEY", "") or os.environ.get("OPENAI_API_KEY", "")) if use_openai else ""
     if use_openai and api_key:
-        client = OpenAI(api_key=api_key)
+        client = make_client(None, api_key)
         model = (getattr(config, "LLM_MODEL", "") or "gpt-4o-mini").strip()
         return client, model
     base_url = getattr(config, "LLM_BASE_URL", "http://127.0.0.1:1234/v1")
-    client = OpenAI(base_url=base_url, api_key="lm-studio")
+    client = make_client(base_url, "lm-studio")
     model = getattr(config, "LLM_MODEL", "") or ""
     if not model:
-        try:
-            models = client.models.list(timeout=3)
-            if models.data and len(models.data) > 0:
-                model = models.data[0].id
-        except Exception:
-            pass
+        model = discover_model(client, base_url)
     return client, model or "default"
 
 
 def _get_voice_client_and_model():
     """语音助手专用：若配置了 VOICE_ASSISTANT_BASE_URL / VOICE_ASSISTANT_MODEL 则用更快模型，否则同 _get_client_and_model。"""
-    from openai import OpenAI
     use_openai = getattr(config, "LLM_USE_OPENAI", False)
-    api_key = getattr(config, "OPENAI_API_KEY", "") or os.environ.get("OPENAI_API_KEY", "")
+    api_key = (getattr(config, "OPENAI_API_KEY", "") or os.environ.get("OPENAI_API_KEY", "")) if use_openai else ""
     if use_openai and api_key:
-        client = OpenAI(api_key=api_key)
+        client = make_client(None, api_key)
         model = (getattr(config, "VOICE_ASSISTANT_MODEL", "") or getattr(config, "LLM_MODEL", "") or "gpt-4o-mini").strip()
         return client, model
     base_url = (getattr(config, "VOICE_ASSISTANT_BASE_URL", "") or "").strip() or getattr(config, "LLM_BASE_URL", "http://127.0.0.1:1234/v1")
-    client = OpenAI(base_url=base_url, api_key="lm-studio")
+    client = make_client(base_url, "lm-studio")
     model = (getattr(config, "VOICE_ASSISTANT_MODEL", "") or "").strip() or getattr(config, "LLM_MODEL", "") or ""
     if not model:
-        try:
-            models = client.models.list(timeout=3)
-            if models.data and len(models.data) > 0:
-                model = models.data[0].id
-        except Exception:
-            pass
+        model = discover_model(client, base_url)
     return client, model or "default"
 
 
@@ -60,7 +66,9 @@ def _parse_action(reply: str) -> Optional[str]:
     """从助手回复中解析 [ACTION:read] / [ACTION:translate] 等，返回 action 或 None。"""
     if not reply:
         return None
-    m = re.search(r"\[ACTION:\s*(\w+)\]", reply, re.IGNORECASE)
+    if "[" not in reply:  # 标签必含 "["：普通闲聊回复不进正则引擎（忽略大小写，不能只查 "[ACTION"）
+        return None
+    m = _ACTION_RE.search(reply)
     if m:
         return m.group(1).lower()
     return None
@@ -78,48 +86,55 @@ def _strip_action_tag(reply: str) -> str:
     """去掉回复中的 [ACTION:xxx] 行，便于界面只显示自然语言。"""
     if not reply:
         return reply
-    return re.sub(r"\s*\[ACTION:\s*\w+\]\s*", "\n", reply).strip()
+    if "[ACTION:" not in reply:  # 去标签的正则区分大小写，无此子串时不可能匹配
+        return reply.strip()
+    return _ACTION_STRIP_RE.sub("\n", reply).strip()
+
+
+# 结论样式的短句：含 好的/正在/已 或句号（以句号结尾自然也包含句号）
+_CONCLUSION_MARKERS = ("好的", "正在", "已", "。", ".")
 
 
 def _extract_conclusion_for_display(reply: str, max_chars: int = 80) -> str:
     """
     从 thinking 模型的长回复中只提取「结论」用于界面展示，过滤掉推理过程。
-    优先：最后几行中像结论的短句（以。结尾或含 好的/正在/已）。
+    优先：最后几行中像结论的短句（以。结尾或含 好的/正在/已）；其次最后一个短行；再次最后一句。
     """
     s = _strip_action_tag(reply)
     if not s or len(s) <= max_chars:
         return s.strip()
-    lines = [ln.strip() for ln in s.splitlines() if ln.strip()]
-    if not lines:
-        return s[-max_chars:].strip()
-    # 结论样式的短句：以。/. 结尾，或含 好的/正在/已
-    conclusion_markers = ("好的", "正在", "已", "。", ".")
-    def looks_like_conclusion(ln: str) -> bool:
-        if len(ln) > max_chars:
-            return False
-        return ln.rstrip().endswith(("。", ".")) or any(m in ln for m in conclusion_markers)
-    candidates = [ln for ln in lines if looks_like_conclusion(ln)]
-    if candidates:
-        return candidates[-1].strip()
-    short = [ln for ln in lines if len(ln) <= max_chars]
-    if short:
-        return short[-1].strip()
-    # 按句号拆，取最后一句
+    # 从末尾单遍扫描：遇到结论样式短句立即返回，顺带记下最后一个短行作为次选
+    last_short: Optional[str] = None
+    for raw in reversed(s.splitlines()):
+        ln = raw.strip()
+        if not ln or len(ln) > max_chars:
+            continue
+        if any(m in ln for m in _CONCLUSION_MARKERS):
+            return ln
+        if last_short is None:
+            last_short = ln
+    if last_short is not None:
+        return last_short
+    # 按句号拆，取最后一句（末尾正好是句号时取倒数第二段）
     for sep in ("。", "."):
-        parts = s.split(sep)
-        if len(parts) >= 2:
-            last = (parts[-1] or parts[-2]).strip()
+        head, found, tail = s.rpartition(sep)
+        if found:
+            last = (tail or head.rpartition(sep)[2]).strip()
             if 0 < len(last) <= max_chars:
                 return last + ("。" if sep == "。" else "")
     return s[-max_chars:].strip()
 
 
+# 被截断的长推理常见开头（忽略大小写与前导空白）
+_THINKING_HEAD_RE = re.compile(r"\s*(?:首先|we are given|okay,|let's|let me|the user)", re.IGNORECASE)
+
+
 def _is_thinking_truncated(reply: str) -> bool:
     """判断是否为被截断的长推理（超时导致），应替换为简短提示。"""
     if not reply or len(reply) < 100:
         return False
-    lower = reply.strip().lower()
-    if lower.startswith(("首先", "we are given", "okay,", "let's", "let me", "the user")):
+    # 锚定开头的正则只看前导空白与前缀，不再为整段回复生成 strip().lower() 副本
+    if _THINKING_HEAD_RE.match(reply):
         return True
     if "根据系统提示" in reply or "回顾指令" in reply:
         return True
@@ -155,6 +170,27 @@ def _build_direct_memory() -> str:
     return memory
 
 
+@functools.lru_cache(maxsize=4)
+def _compose_sys_prompt(base: str, memory: str) -> str:
+    """系统提示 + 【长期记忆】；人设与记忆很少变化，相同输入直接复用上次拼好的字符串。"""
+    if not memory:
+        return base
+    return base.rstrip() + "\n\n【长期记忆】\n" + memory
+
+
+def _normalize_inputs(user_message: str, current_ocr_content: str) -> Optional[Tuple[str, str]]:
+    """直连入口共用：返回 (去空白的用户消息, 去空白并限长的画面文字)；用户消息为空时返回 None。"""
+    user_message = user_message.strip() if user_message else ""
+    if not user_message:
+        return None
+    ctx = current_ocr_content.strip() if current_ocr_content else ""
+    # 画面文字越长 LLM 预填充越慢：超出上限时只保留末尾（最新的几行）
+    max_ctx = getattr(config, "VOICE_ASSISTANT_OCR_CTX_MAX_CHARS", 600)
+    if max_ctx > 0 and len(ctx) > max_ctx:
+        ctx = "…（前文已截断）\n" + ctx[-max_ctx:]
+    return user_message, ctx
+
+
 def _build_user_message(
     user_message: str,
     current_ocr_content: str,
@@ -162,18 +198,42 @@ def _build_user_message(
     uploaded_file_content: Optional[str] = None,
     uploaded_max_chars: int = 8000,
 ) -> str:
-    """拼装发给 LLM 的用户内容：可选上传文件 + 当前画面 + 用户说。"""
+    """拼装发给 LLM 的用户内容：可选上传文件 + 当前画面 + 用户说。两段文本须已经 _normalize_inputs 去空白。"""
     parts = []
     if (uploaded_file_name or "").strip() and (uploaded_file_content or "").strip():
         content = (uploaded_file_content or "").strip()
         if len(content) > uploaded_max_chars:
             content = content[:uploaded_max_chars] + "\n\n…（已截断）"
         parts.append(f"【用户上传文件】文件名: {uploaded_file_name.strip()}\n内容：\n{content}")
-    ctx = (current_ocr_content or "").strip() or "（暂无）"
-    parts.append(f"【当前画面文字】\n{ctx}\n\n用户说：{(user_message or '').strip()}")
+    ctx = current_ocr_content or "（暂无）"
+    parts.append(f"【当前画面文字】\n{ctx}\n\n用户说：{user_message}")
     return "\n\n".join(parts)
 
 
+def _build_direct_request(
+    user_message: str,
+    recent_history: Optional[List[Tuple[str, str]]],
+    current_ocr_content: str,
+    uploaded_file_name: Optional[str],
+    uploaded_file_content: Optional[str],
+) -> Tuple[List[dict], int, float]:
+    """chat_direct_llm / chat_direct_llm_stream 共用：返回 (messages, max_tokens, timeout)。"""
+    sys_prompt = _compose_sys_prompt(_direct_llm_system_prompt(), _build_direct_memory())
+    timeout = getattr(config, "VOICE_ASSISTANT_TIMEOUT_SEC", 90)
+    if _is_thinking_model(getattr(config, "LLM_MODEL", "") or ""):
+        timeout = max(timeout, 120)
+    max_tokens = getattr(config, "VOICE_ASSISTANT_MAX_TOKENS", 950)
+    context_n = getattr(config, "VOICE_ASSISTANT_CONTEXT_MESSAGES", 24)
+    messages: List[dict] = [{"role": "system", "content": sys_prompt}]
+    if recent_history:
+        messages.extend({"role": role, "content": text} for role, text in recent_history[-context_n:])
+    user_with_ctx = _build_user_message(
+        user_message, current_ocr_content, uploaded_file_name, uploaded_file_content
+    )
+    messages.append({"role": "user", "content": user_with_ctx})
+    return messages, max_tokens, timeout
+
+
 def chat_direct_llm(
     user_message: str,
     recent_history: Optional[List[Tuple[str, str]]] = None,
@@ -185,27 +245,13 @@ def chat_direct_llm(
     直接对接 LLM：把用户消息和对话历史发给模型，附带当前画面文字（及可选上传文件）供参考，返回模型回复原文。
     不做 [ACTION:xxx] 解析，对话窗口只做中转。
     """
-    user_message = (user_message or "").strip()
-    if not user_message:
+    inputs = _normalize_inputs(user_message, current_ocr_content)
+    if inputs is None:
         return "（请说点什么）"
-    sys_prompt = _direct_llm_system_prompt()
-    memory = _build_direct_memory()
-    if memory:
-        sys_prompt = sys_prompt.rstrip() + "\n\n【长期记忆】\n" + memory
-    timeout = getattr(config, "VOICE_ASSISTANT_TIMEOUT_SEC", 90)
-    model = getattr(config, "LLM_MODEL", "") or ""
-    if "thinking" in model.lower():
-        timeout = max(timeout, 120)
-    max_tokens = getattr(config, "VOICE_ASSISTANT_MAX_TOKENS", 950)
-    context_n = getattr(config, "VOICE_ASSISTANT_CONTEXT_MESSAGES", 24)
-    messages: List[dict] = [{"role": "system", "content": sys_prompt}]
-    if recent_history:
-        for role, text in recent_history[-context_n:]:
-            messages.append({"role": role, "content": text})
-    user_with_ctx = _build_user_message(
-        user_message, current_ocr_content, uploaded_file_name, uploaded_file_content
+    user_message, current_ocr_content = inputs
+    messages, max_tokens, timeout = _build_direct_request(
+        user_message, recent_history, current_ocr_content, uploaded_file_name, uploaded_file_content
     )
-    messages.append({"role": "user", "content": user_with_ctx})
     try:
         client, model_id = _get_voice_client_and_model()
         resp = client.chat.completions.create(
@@ -218,6 +264,7 @@ def chat_direct_llm(
         reply = (resp.choices[0].message.content or "").strip()
         return reply or "（未收到回复，请重试）"
     except Exception as e:
+        invalidate_on_model_error(e)
         err = str(e).strip()[:80]
         if "timeout" in err.lower() or "timed out" in err.lower():
             return "（请求超时或连接断开，请重试）"
@@ -236,27 +283,13 @@ def chat_direct_llm_stream(
     直接对接 LLM 并流式返回：每收到一块内容就调用 on_chunk(delta)，主线程可据此刷新对话窗口。
     可选附带用户上传文件内容。返回完整回复；异常时返回错误信息字符串。
     """
-    user_message = (user_message or "").strip()
-    if not user_message:
+    inputs = _normalize_inputs(user_message, current_ocr_content)
+    if inputs is None:
         return "（请说点什么）"
-    sys_prompt = _direct_llm_system_prompt()
-    memory = _build_direct_memory()
-    if memory:
-        sys_prompt = sys_prompt.rstrip() + "\n\n【长期记忆】\n" + memory
-    timeout = getattr(config, "VOICE_ASSISTANT_TIMEOUT_SEC", 90)
-    model = getattr(config, "LLM_MODEL", "") or ""
-    if "thinking" in model.lower():
-        timeout = max(timeout, 120)
-    max_tokens = getattr(config, "VOICE_ASSISTANT_MAX_TOKENS", 950)
-    context_n = getattr(config, "VOICE_ASSISTANT_CONTEXT_MESSAGES", 24)
-    messages: List[dict] = [{"role": "system", "content": sys_prompt}]
-    if recent_history:
-        for role, text in recent_history[-context_n:]:
-            messages.append({"role": role, "content": text})
-    user_with_ctx = _build_user_message(
-        user_message, current_ocr_content, uploaded_file_name, uploaded_file_content
+    user_message, current_ocr_content = inputs
+    messages, max_tokens, timeout = _build_direct_request(
+        user_message, recent_history, current_ocr_content, uploaded_file_name, uploaded_file_content
     )
-    messages.append({"role": "user", "content": user_with_ctx})
     try:
         client, model_id = _get_voice_client_and_model()
         stream = client.chat.completions.create(
@@ -268,20 +301,45 @@ def chat_direct_llm_stream(
             stream=True,
         )
         full: List[str] = []
+        # 合并小块再回调：首块立即送出（不影响首字延迟），之后批量按 3 倍增长到上限，或距上次送出超过 flush 间隔即送出
+        batch_max = max(1, int(getattr(config, "VOICE_ASSISTANT_STREAM_BATCH_MAX", 32)))
+        flush_sec = max(0.0, getattr(config, "VOICE_ASSISTANT_STREAM_FLUSH_MS", 50) / 1000.0)
+        batch_size = 1
+        pending: List[str] = []
+        pending_len = 0
+        last_flush = time.monotonic()
+
+        def _flush() -> None:
+            nonlocal pending_len, last_flush
+            if on_chunk:
+                try:
+                    on_chunk("".join(pending))
+                except Exception:
+                    pass
+            pending.clear()
+            pending_len = 0
+            last_flush = time.monotonic()
+
+        # 每个 delta 都会走这里：方法预先绑定到局部变量；SDK 的 delta.content 只会是 str 或 None
+        full_append = full.append
+        pending_append = pending.append
         for chunk in stream:
-            if not chunk.choices or len(chunk.choices) == 0:
+            if not chunk.choices:
                 continue
-            delta = getattr(chunk.choices[0].delta, "content", None) or ""
-            if isinstance(delta, str) and delta:
-                full.append(delta)
-                if on_chunk:
-                    try:
-                        on_chunk(delta)
-                    except Exception:
-                        pass
+            delta = chunk.choices[0].delta.content
+            if delta:
+                full_append(delta)
+                pending_append(delta)
+                pending_len += len(delta)
+                if pending_len >= batch_size or time.monotonic() - last_flush >= flush_sec:
+                    _flush()
+                    batch_size = min(batch_size * 3, batch_max)
+        if pending:
+            _flush()
         reply = "".join(full).strip()
         return reply or "（未收到回复，请重试）"
     except Exception as e:
+        invalidate_on_model_error(e)
         err = str(e).strip()[:80]
         if "timeout" in err.lower() or "timed out" in err.lower():
             return "（请求超时或连接断开，请重试）"
@@ -299,15 +357,17 @@ def chat_with_assistant(
     user_message = (user_message or "").strip()
     if not user_message:
         return "(请说点什么)", None
+    # 朗读指令：系统提示词已规定回复「好的，正在朗读。[ACTION:read]」，直接返回，省去一次 LLM 往返
+    if any(k in user_message for k in getattr(config, "VOICE_READ_COMMAND_KEYWORDS", ())):
+        return "好的，正在朗读。", "read"
 
-    sys_prompt = getattr(config, "VOICE_ASSISTANT_SYSTEM", "") or "You are a helpful assistant."
-    memory = (getattr(config, "VOICE_ASSISTANT_MEMORY", "") or "").strip()
-    if memory:
-        sys_prompt = sys_prompt.rstrip() + "\n\n【长期记忆】\n" + memory
+    sys_prompt = _compose_sys_prompt(
+        getattr(config, "VOICE_ASSISTANT_SYSTEM", "") or "You are a helpful assistant.",
+        (getattr(config, "VOICE_ASSISTANT_MEMORY", "") or "").strip(),
+    )
     timeout = getattr(config, "VOICE_ASSISTANT_TIMEOUT_SEC", 90)
     # thinking 类模型输出慢，容易触发 Client disconnected，单独加长超时
-    model = getattr(config, "LLM_MODEL", "") or ""
-    if "thinking" in model.lower():
+    if _is_thinking_model(getattr(config, "LLM_MODEL", "") or ""):
         timeout = max(timeout, 120)
     max_tokens = getattr(config, "VOICE_ASSISTANT_MAX_TOKENS", 400)
 
@@ -346,6 +406,7 @@ def chat_with_assistant(
                 display_reply = "（已执行）" if action else "（无有效回复，请重试）"
         return display_reply or "（无回复）", action
     except Exception as e:
+        invalidate_on_model_error(e)
         err = str(e).strip()[:80]
         if "timeout" in err.lower() or "timed out" in err.lower():
             return "（请求超时或连接断开，请重试。若经常出现可调大 config 中 VOICE_ASSISTANT_TIMEOUT_SEC）", None
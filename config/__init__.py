@@ -1,5 +1,6 @@
 # -*- coding: utf-8 -*-
 """全局配置：摄像头、OCR、LLM、超时与降级"""
+import hashlib
 import os
 
 # 项目根目录（config 包所在目录的上一级）
@@ -9,6 +10,8 @@ _ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 CAMERA_INDEX = 0
 CAMERA_WIDTH = 1280
 CAMERA_HEIGHT = 720
+CAMERA_BUFFER_SIZE = 1  # 驱动帧队列长度，1=总取最新帧（降低画面延迟）；0=不设置，用驱动默认
+CAMERA_FOURCC = ""      # 像素格式，如 "MJPG"（多数 USB 摄像头 720p 下用 MJPG 才能跑满 30 帧）；空=驱动默认
 # 启动时是否显示摄像头实时画面；False 则只显示占位，可在对话窗口点「打开摄像头」调出
 CAMERA_WINDOW_START_VISIBLE = True
 # 按需启停：按此键或点对话窗口「打开/关闭摄像头」切换，默认不打开摄像头（避免报错）
@@ -17,11 +20,18 @@ CAMERA_START_OFF = True       # True=启动时不打开摄像头，按 C 或点
 # 识别文字在摄像头画面上的显示方式：full=全文叠加 minimal=仅角落一两行不挡视线 none=不叠加（全文在对话窗口「当前识别」看）
 OCR_DISPLAY_ON_CAMERA = "minimal"
 FRAME_SKIP = 2  # 每 N 帧做一次 OCR；2=隔帧识别，减少抖动、提高稳定；1=每帧（更灵敏但易晃）
+# 画面解码/显示帧率上限：摄像头每帧都 grab，但只按此节奏解码、叠加显示并交给 OCR（FRAME_SKIP 按解码帧计）；0=每帧都解码
+CAMERA_DISPLAY_FPS = 15
 
 # 多帧融合 + 稳定后才 OCR（开太猛会几乎不识别，先关掉或放宽）
 OCR_FUSION_FRAMES = 0       # 0=关闭；5 帧平均会糊字，先关掉保证能出字
 OCR_MOTION_STABLE_ENABLED = False  # True=仅稳定时才 OCR，易导致“啥都不识别”；先关掉
 OCR_MOTION_STABLE_THRESHOLD = 18.0  # 与上一帧平均像素差低于此认为稳定
+# 帧感知哈希 OCR 缓存：与近期某帧哈希汉明距离 <= MAX_DISTANCE 时复用其识别结果、跳过 OCR。
+# 0=关闭。8×8 均值哈希分辨不出版式相近的不同文字（如翻到下一页），只建议画面长时间静止的场景开启（如 128）
+OCR_FRAME_HASH_CACHE_SIZE = 0
+OCR_FRAME_HASH_SIZE = 8            # 哈希边长，位数 = 边长²；加大更能区分相近画面，但复用率下降
+OCR_FRAME_HASH_MAX_DISTANCE = 2
 
 # OCR：使用 PaddleOCR。推荐环境（Windows 最稳）：Python 3.10 + paddlepaddle==2.6.2 + paddleocr==2.7.0.3（经典版，不走 paddlex/PDX）
 USE_EASYOCR = False   # False=先用 PaddleOCR，失败再用 EasyOCR；True=反之
@@ -32,7 +42,10 @@ OCR_LANGS = ["en", "fr"]  # EasyOCR 用；Paddle 用 PADDLE_OCR_LANG
 OCR_GPU = True  # RTX4060 建议 True；Paddle 用 PADDLE_OCR_FORCE_CPU 控制是否强制 CPU
 # PaddleOCR 语言：ch=中英, en=英文, fr=法语等
 PADDLE_OCR_LANG = "en"
-PADDLE_OCR_FORCE_CPU = True
+PADDLE_OCR_FORCE_CPU = False  # True=强制 CPU；False 时按 OCR_GPU 用 GPU，GPU 引擎创建失败会自动改用 CPU
+# GPU 推理精度与 TensorRT（仅 GPU 时生效）：fp16 需配合 TensorRT 才会真正启用，未装 TensorRT 请保持 USE_TENSORRT=False
+PADDLE_OCR_PRECISION = "fp16"
+PADDLE_OCR_USE_TENSORRT = False
 # 置信度：单框低于此丢弃；整体平均低于此视为无有效文本（提高可减少乱码、提升观感）
 OCR_MIN_BOX_CONFIDENCE = 0.40
 OCR_MIN_AVG_CONFIDENCE = 0.35
@@ -46,7 +59,8 @@ OCR_PREPROCESS_USE_ADAPTIVE_THRESH = True
 OCR_USE_SHARPEN = False     # 锐化先关，出字后再试
 OCR_SHARPEN_STRENGTH = 1.4
 OCR_USE_SKEW_CORRECTION = False  # 倾斜校正（稍慢）
-OCR_RESIZE_SHORT_EDGE = 0   # 短边缩放到此（0=不缩放），建议 320~640
+OCR_RESIZE_SHORT_EDGE = 480  # ROI 裁剪后短边超过此值则缩小到此（0=不缩放），建议 320~640；像素少检测快，显示仍用原画面
+SERVER_JPEG_REDUCED_DECODE = True  # Web API：大 JPEG 按上面短边需求缩小解码（1/2~1/8），省解码与缩放时间
 # 光流防抖（可选，高端方案，当前未实现）
 OCR_USE_OPTICAL_FLOW_STAB = False
 # 去抖动：最近 N 次结果中至少 K 次相同/相似才视为稳定（加大 N、K 可减少“稍动就重识”）
@@ -57,6 +71,9 @@ OCR_DEBOUNCE_SIMILARITY_VOTE = 0.88
 # 软稳定：当前帧与“稳定文本”相似度 >= 此阈值才认为仍在同一段（提高可减少误判）
 OCR_SOFT_STABLE_ENABLED = True
 OCR_SOFT_STABLE_SIMILARITY = 0.92
+# 去抖/软稳定/朗读去重的相似度算法：difflib=与 difflib.SequenceMatcher 一致（默认）；
+# rapidfuzz=用 rapidfuzz 的 LCS 相似度（需 pip install rapidfuzz，快得多，但数值偏高，阈值宜相应调高）
+OCR_SIMILARITY_BACKEND = "difflib"
 # 按行/段落输出：同一行用空格、行间用换行、段间用双换行，避免整段空格拼接不连贯
 OCR_KEEP_LINE_STRUCTURE = True
 OCR_LINE_Y_TOLERANCE_RATIO = 0.025   # 中心 y 相差小于此比例*图高视为同一行（约 2.5%）
@@ -65,7 +82,12 @@ OCR_PARAGRAPH_GAP_RATIO = 1.8        # 行间距大于 平均行高*此比例 
 # Agent E：LLM 性能与体验（去抖 + 缓存 + 节流）
 LLM_MIN_INTERVAL_MS = 1000       # 相邻两次真实 LLM 调用最小间隔（毫秒）
 LLM_CACHE_MAX_SIZE = 200         # LLM 结果缓存最大条数
-LLM_CACHE_TTL_SEC = 600          # 缓存有效期（秒）
+LLM_CACHE_TTL_SEC = 600          # 缓存有效期（秒），LLM_CACHE_TTL 未列出的用途用此值
+# 按用途的缓存有效期（秒），0=不缓存：纠错/读音几乎确定，可长；翻译居中；例句每次可换新，较短
+LLM_CACHE_TTL = {"correct": 86400, "pronounce": 86400, "examples": 43200, "translate": 3600}
+# 缓存后端：memory=仅本进程；sqlite=同时写入本地 SQLite，重启后 TTL 内的纠错结果仍可命中
+LLM_CACHE_BACKEND = "sqlite"
+LLM_CACHE_DB = os.path.join(_ROOT_DIR, "logs", "llm_cache.sqlite")
 
 # LLM 纠错：二选一 → 本地 LM Studio 或 OpenAI（ChatGPT 会员）
 # 使用 ChatGPT：设为 True，并设置 OPENAI_API_KEY（建议用环境变量，勿提交到仓库）
@@ -83,6 +105,9 @@ LLM_INPUT_MAX_CHARS = 800  # 输入超长时截断到此字符数，避免超时
 # 熔断：连续失败次数超过此后，在 cooldown 秒内不再请求 LLM，直接返回原文
 LLM_CIRCUIT_BREAKER_FAILURES = 3
 LLM_CIRCUIT_BREAKER_COOLDOWN_SEC = 30
+# 冷却结束后放行一次试探请求：仍失败则冷却时间乘以此倍数，最长不超过 LLM_CIRCUIT_MAX_COOLDOWN_SEC；成功即恢复
+LLM_CIRCUIT_BACKOFF_MULT = 2.0
+LLM_CIRCUIT_MAX_COOLDOWN_SEC = 300
 # OCR 超时（秒），防止单次 OCR 卡死管道
 OCR_FUTURE_TIMEOUT_SEC = 15
 
@@ -114,6 +139,7 @@ CHAT_WINDOW_WIDTH = 520
 CHAT_WINDOW_HEIGHT = 420
 CHAT_HISTORY_MAX = 64          # 保留最近 N 条对话（短期记忆，用户+助手各算一条）
 VOICE_ASSISTANT_CONTEXT_MESSAGES = 24   # 传给 LLM 的最近对话条数，便于理解上下文
+VOICE_ASSISTANT_OCR_CTX_MAX_CHARS = 600  # 附带给 LLM 的当前画面文字上限，超出时保留末尾；0 表示不截断
 VOICE_ASSISTANT_MEMORY = ""    # 长期记忆：写在这里的内容会追加到系统提示，LLM 始终可见（如学情摘要、学生水平）
 # 直接对话模式下的系统人设（VOICE_ASSISTANT_DIRECT_LLM=True 时用）。空则用默认通用助手。
 # 法语教学专家示例见 docs/PRODUCT_VISION_FRENCH_EXPERT.md，复制到下面并去掉三引号即可启用。
@@ -133,6 +159,9 @@ VOICE_READ_COMMAND_KEYWORDS = ("读一下", "读出来", "朗读", "读一下视
 VOICE_ASSISTANT_TIMEOUT_SEC = 90
 # 是否使用流式请求（stream=True）：LM Studio 0.3.x 支持，可边收边显示、减少断连；若仍断连或模型不支持可改为 False
 VOICE_ASSISTANT_USE_STREAM = True
+# 流式回复合并后再刷新对话框：首块立即显示，之后每批最多这么多字，或距上次刷新超过 N 毫秒即刷新
+VOICE_ASSISTANT_STREAM_BATCH_MAX = 32
+VOICE_ASSISTANT_STREAM_FLUSH_MS = 50
 # thinking 模型先输出推理再给结论，需留足空间避免在 [ACTION:xxx] 前被截断（length）；日志见 completion_tokens 达 686+ 仍截断则再调大
 VOICE_ASSISTANT_MAX_TOKENS = 950
 # 界面只展示「结论」的最大字数，超过则从回复末尾提取短句（过滤 thinking 冗长推理）
@@ -206,6 +235,7 @@ VISION_LLM_MODEL = ""      # 空则用 LLM_MODEL（qwen3-vl-8b 支持识图）
 VISION_LLM_TIMEOUT_SEC = 20
 VISION_LLM_MAX_TOKENS = 500
 VISION_LLM_MAX_LONG_EDGE = 1024   # 图长边上限，超则缩放以省显存/流量
+VISION_LLM_GRAYSCALE = True       # 送图前转灰度：只提取文字不需要颜色，JPEG 编码与上传数据量约减为 1/3
 # 交叉验证模式：show_both=同时显示OCR与Vision  prefer_ocr=以OCR为准  prefer_vision=以Vision为准  merge_llm=LLM合并两者
 CROSS_VALIDATE_MODE = "show_both"
 
@@ -224,13 +254,18 @@ STRICT_CORRECTION_USER_TEMPLATE = """Correct the text below (spelling/punctuatio
 
 {text}"""
 
+# 纠错提示词指纹：提示词一改就变，持久化的 LLM 缓存按它失效，不会把旧提示词的结果带到新版本
+PROMPT_VERSION = hashlib.blake2b(
+    (STRICT_CORRECTION_SYSTEM + STRICT_CORRECTION_USER_TEMPLATE).encode("utf-8"), digest_size=8
+).hexdigest()
+
 # 中文显示字体（Windows 常见）
 FONT_PATHS = [
     "C:/Windows/Fonts/msyh.ttc",   # 微软雅黑
     "C:/Windows/Fonts/simhei.ttf",  # 黑体
     "C:/Windows/Fonts/simsun.ttc",  # 宋体
 ]
-DEFAULT_FONT = FONT_PATHS[0]
+DEFAULT_FONT = next((p for p in FONT_PATHS if os.path.isfile(p)), None)  # 第一个实际存在的字体，都不存在为 None
 
 # 语音朗读（朗读 Agent：先识别英/法再选发音人）
 ENABLE_TTS = True
@@ -241,7 +276,13 @@ TTS_VOICE_FR = "fr-FR-DeniseNeural"
 TTS_DEFAULT_LANG = "en"
 # 强制朗读语言：设为 "fr" 或 "en" 时不再自动检测，直接用法语/英语读（OCR 无重音时用法语可设 TTS_FORCE_LANG = "fr"）
 TTS_FORCE_LANG = ""
+# 可选：fastText 语言识别模型（lid.176.ftz，约 1MB，短文本比 langdetect 更快更准；需 pip install fasttext）
+# 相对项目根；文件不存在或未装 fasttext 时自动回退 langdetect
+TTS_FASTTEXT_LID_PATH = "lid.176.ftz"
 TTS_RATE = "+0%"   # 语速，如 "+5%" 略快、"-10%" 略慢
+# 装了 miniaudio 时边合成边播放（首句更快出声，不启动外部播放器）；False 则始终存 MP3 后用系统播放器
+TTS_STREAM_PLAYBACK = True
+TTS_WORKERS = 1   # 朗读工作线程数：1=排队依次朗读（同一时刻只有一个 edge-tts 请求）
 # 纠错结果稳定后再朗读：最近 N 次中至少 K 次相同/相似才触发朗读
 TTS_DEBOUNCE_HISTORY_LEN = 3
 TTS_DEBOUNCE_MIN_VOTES = 2
@@ -256,6 +297,8 @@ LOG_TO_FILE = True
 LOG_ROTATING_MAX_BYTES = 5 * 1024 * 1024  # 5MB 滚动
 LOG_BACKUP_COUNT = 3
 LOG_DEBUG_SAVE_FRAMES = 0   # 非 0 时在异常或周期保存最近 N 帧到 logs/frames/
+LOG_DEBUG_FRAME_QUALITY = 80  # 存帧 JPEG 质量
+LOG_DEBUG_FRAME_ASYNC = True  # 在后台线程编码写盘，不阻塞采集/OCR 线程
 METRICS_LOG_INTERVAL_SEC = 30  # 每 N 秒打一条指标（fps/ocr_ms/llm_ms/pending）
 # 摄像头断线重试
 CAMERA_REOPEN_RETRIES = 3
@@ -10,10 +10,26 @@ import sys
 _script_dir = os.path.dirname(os.path.abspath(__file__))
 if _script_dir not in sys.path:
     sys.path.insert(0, _script_dir)
+
+
+def _purge_foreign_tools() -> bool:
+    """
+    已注册的 tools 不是本项目的（被别的环境提前导入）时，清掉 tools 及其子模块，返回 True。
+    未导入或已是本项目的则不扫 sys.modules、不动已加载模块（重复清会让 tools.* 被重新执行一遍、模块状态分成两份）。
+    """
+    mod = sys.modules.get("tools")
+    if mod is None:
+        return False
+    mod_file = getattr(mod, "__file__", None)
+    if mod_file and os.path.dirname(os.path.abspath(mod_file)) == os.path.join(_script_dir, "tools"):
+        return False
+    for name in [n for n in sys.modules if n == "tools" or n.startswith("tools.")]:
+        del sys.modules[name]
+    return True
+
+
 # 清掉可能被别的环境提前注册的 tools，强制用本项目的
-for _n in list(sys.modules):
-    if _n == "tools" or _n.startswith("tools."):
-        del sys.modules[_n]
+_purge_foreign_tools()
 
 import time
 
@@ -35,18 +51,48 @@ from tools.ocr_engine import init_paddle_ocr_engine
 _manager_window = None
 # 语音助手窗口：关闭仅关本窗口，不退出程序；可从管理窗口再次打开
 _chat_window = None
-# 摄像头隐藏时的占位图（仅用于 show_camera_window 隐藏时的占位）
-_placeholder_frame = None
+# 摄像头隐藏时的占位图（仅用于 show_camera_window 隐藏时的占位），按 (高, 宽) 缓存，切换分辨率不重建
+_placeholder_cache: dict = {}
 
 # 摄像头窗口标题（仅在实际打开摄像头时创建/显示，关闭时销毁）
 _CAMERA_WIN_NAME = "Camera OCR + LLM"
 
 
+def _get_placeholder(h: int, w: int) -> np.ndarray:
+    """取 (h, w) 尺寸的占位图：首次用 np.full 一次填充并画好提示文字，之后直接复用。"""
+    img = _placeholder_cache.get((h, w))
+    if img is None:
+        img = draw_text_block(
+            np.full((h, w, 3), 36, dtype=np.uint8),
+            ["摄像头已隐藏", "点击对话窗口「打开摄像头」恢复识别"],
+            x=24, y=24, font_size=20, color_bgr=(180, 180, 180),
+        )
+        _placeholder_cache[(h, w)] = img
+    return img
+
+
+def _destroy_cv_window(win: str) -> None:
+    """关闭摄像头窗口；之后不再调 waitKey，这里补一次事件泵，让 HighGUI（如 GTK 后端）真正把窗口关掉。"""
+    try:
+        cv2.destroyWindow(win)
+        cv2.waitKey(1)
+    except Exception:
+        pass
+
+
 def _open_camera():
     cap = cv2.VideoCapture(config.CAMERA_INDEX)
     if cap.isOpened():
+        # 像素格式须在分辨率之前设置，部分驱动改格式会重置分辨率；不支持时 set 返回 False，忽略即可
+        fourcc = getattr(config, "CAMERA_FOURCC", "") or ""
+        if len(fourcc) == 4:
+            cap.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*fourcc))
         cap.set(cv2.CAP_PROP_FRAME_WIDTH, config.CAMERA_WIDTH)
         cap.set(cv2.CAP_PROP_FRAME_HEIGHT, config.CAMERA_HEIGHT)
+        # 驱动队列只留 1 帧：grab 到的总是最新画面，OCR 结果不落后于实际画面几帧
+        buffer_size = getattr(config, "CAMERA_BUFFER_SIZE", 1)
+        if buffer_size > 0:
+            cap.set(cv2.CAP_PROP_BUFFERSIZE, buffer_size)
     return cap
 
 
@@ -77,25 +123,34 @@ def main() -> int:
         log(f"PaddleOCR 预初始化异常（OCR 可能不可用）: {e}", level="WARNING")
     start_worker(state, metrics)
     key_toggle = getattr(config, "KEY_TOGGLE_CAMERA", ord("c"))
+    # R/T/P/E 指令键表（大小写都认），循环外建一次，每轮只做一次 dict 查找
+    cmd_keymap = {}
+    for cmd_name, cfg_key, default_key in (
+        ("read", "KEY_READ", ord("r")),
+        ("translate", "KEY_TRANSLATE", ord("t")),
+        ("pronounce", "KEY_PRONOUNCE", ord("p")),
+        ("examples", "KEY_EXAMPLES", ord("e")),
+    ):
+        k = getattr(config, cfg_key, default_key)
+        cmd_keymap.setdefault(k, cmd_name)
+        cmd_keymap.setdefault(k - 32, cmd_name)
     log("后台已启动。按 C 键或点对话窗口「打开/关闭摄像头」启停识别，按 Q 退出。")
     win = _CAMERA_WIN_NAME
     # 摄像头窗口不在此创建，在首次打开摄像头时再创建，关闭时销毁
     if getattr(config, "ENABLE_VOICE_ASSISTANT", False):
-        # 按路径强制加载本项目的 tools，避免被 site-packages 里的 tools 顶掉
-        import importlib.util
-        _tools_dir = os.path.join(_script_dir, "tools")
-        for _n in list(sys.modules):
-            if _n == "tools" or _n.startswith("tools."):
-                del sys.modules[_n]
-        if _script_dir not in sys.path:
-            sys.path.insert(0, _script_dir)
-        _spec = importlib.util.spec_from_file_location(
-            "tools", os.path.join(_tools_dir, "__init__.py"),
-            submodule_search_locations=[_tools_dir],
-        )
-        _tools_mod = importlib.util.module_from_spec(_spec)
-        sys.modules["tools"] = _tools_mod
-        _spec.loader.exec_module(_tools_mod)
+        # 按路径强制加载本项目的 tools，避免被 site-packages 里的 tools 顶掉；已是本项目的（通常如此）则直接复用
+        if _purge_foreign_tools() or "tools" not in sys.modules:
+            import importlib.util
+            _tools_dir = os.path.join(_script_dir, "tools")
+            if _script_dir not in sys.path:
+                sys.path.insert(0, _script_dir)
+            _spec = importlib.util.spec_from_file_location(
+                "tools", os.path.join(_tools_dir, "__init__.py"),
+                submodule_search_locations=[_tools_dir],
+            )
+            _tools_mod = importlib.util.module_from_spec(_spec)
+            sys.modules["tools"] = _tools_mod
+            _spec.loader.exec_module(_tools_mod)
         from tools.chat_window import ChatWindow
         from tools.manager_window import ManagerWindow
         global _manager_window, _chat_window
@@ -151,6 +206,19 @@ def main() -> int:
     last_metrics_time = time.monotonic()
     last_fps = 0.0
     retries_left = getattr(config, "CAMERA_REOPEN_RETRIES", 3)
+    # 每次循环都 grab（清掉驱动里的旧帧、不解码），只按 CAMERA_DISPLAY_FPS 的节奏 retrieve 解码并显示/送 OCR
+    display_fps = getattr(config, "CAMERA_DISPLAY_FPS", 15)
+    decode_interval = 1.0 / display_fps if display_fps > 0 else 0.0
+    next_decode_time = 0.0
+    # 循环内不变的配置只读一次
+    display_mode = getattr(config, "OCR_DISPLAY_ON_CAMERA", "full") or "full"
+    metrics_interval = getattr(config, "METRICS_LOG_INTERVAL_SEC", 30)
+    # 上次组装文字行时的结果与 FPS：都没变则复用 overlay_lines
+    overlay_res = None
+    overlay_fps = None
+    overlay_lines: list = []
+    # 是否存在 OpenCV 窗口：没有时不调 cv2.waitKey（按键只会送到 HighGUI 窗口，且每轮都要跑一遍事件泵）
+    have_cv_window = False
     try:
         while True:
             if state.get_quit_requested():
@@ -166,7 +234,12 @@ def main() -> int:
                 except Exception:
                     pass
             camera_wanted = state.get_camera_wanted()
-            key = cv2.waitKey(1) & 0xFF
+            if have_cv_window:
+                key = cv2.waitKey(1) & 0xFF
+            else:
+                # 只有 Tk 窗口：Tk 事件已在上面/下面 update()，这里睡 10ms 让出 CPU，不再每毫秒空转一次
+                time.sleep(0.01)
+                key = 0xFF
 
             # 按 C 键切换摄像头开关
             if key == key_toggle or key == key_toggle - 32:
@@ -177,10 +250,9 @@ def main() -> int:
                     if cap is not None:
                         cap.release()
                         cap = None
-                    try:
-                        cv2.destroyWindow(win)
-                    except Exception:
-                        pass
+                    if have_cv_window:
+                        have_cv_window = False
+                        _destroy_cv_window(win)
                     if _chat_window is not None:
                         _chat_window.update_from_state()
                         _chat_window.update()
@@ -193,10 +265,9 @@ def main() -> int:
                 if cap is not None:
                     cap.release()
                     cap = None
-                try:
-                    cv2.destroyWindow(win)
-                except Exception:
-                    pass
+                if have_cv_window:
+                    have_cv_window = False
+                    _destroy_cv_window(win)
                 if _chat_window is not None:
                     _chat_window.update_from_state()
                     _chat_window.update()
@@ -205,7 +276,7 @@ def main() -> int:
                 if key == ord("q") or key == ord("Q"):
                     break
                 now = time.monotonic()
-                if now - last_metrics_time >= getattr(config, "METRICS_LOG_INTERVAL_SEC", 30):
+                if now - last_metrics_time >= metrics_interval:
                     last_metrics_time = now
                 continue
 
@@ -219,13 +290,21 @@ def main() -> int:
                     continue
                 cv2.namedWindow(win, cv2.WINDOW_NORMAL)
                 cv2.resizeWindow(win, config.CAMERA_WIDTH, config.CAMERA_HEIGHT)
+                have_cv_window = True
                 retries_left = getattr(config, "CAMERA_REOPEN_RETRIES", 3)
 
+            frame = None
             try:
-                ret, frame = cap.read()
+                ret = cap.grab()
+                if ret:
+                    now = time.monotonic()
+                    # 容差 1/4 个间隔：帧到达时间有抖动，避免恰好晚一点就多跳过一帧
+                    if now >= next_decode_time - 0.25 * decode_interval:
+                        next_decode_time = max(next_decode_time + decode_interval, now - decode_interval)
+                        ret, frame = cap.retrieve()
             except Exception as e:
                 log(f"cap.read 异常: {e}", level="ERROR")
-                save_debug_frame(frame if "frame" in dir() else None, "read_error")
+                save_debug_frame(None, "read_error")
                 ret = False
             if not ret:
                 log("读取帧失败，尝试重连摄像头...", level="ERROR")
@@ -243,58 +322,55 @@ def main() -> int:
                     continue
                 retries_left = getattr(config, "CAMERA_REOPEN_RETRIES", 3)
                 continue
-            try:
-                metrics.tick_frame()
-                state.set_frame(frame)
-                res = state.get_latest_result()
-                display_mode = getattr(config, "OCR_DISPLAY_ON_CAMERA", "full") or "full"
-                if display_mode == "none":
-                    lines = []
-                elif display_mode == "minimal":
-                    lines = build_display_lines_compact(
-                        res.raw_ocr,
-                        res.corrected,
-                        res.confidence,
-                        res.ocr_time_ms,
-                        res.llm_time_ms,
-                        fps=last_fps,
-                        debounced_ocr=res.debounced_ocr,
-                    )
-                    h, w = frame.shape[:2]
-                    frame = draw_text_block(frame, lines, x=max(10, w - 520), y=max(10, h - 80), font_size=14, color_bgr=(0, 255, 0))
-                else:
-                    lines = build_display_lines(
-                        res.raw_ocr,
-                        res.corrected,
-                        res.confidence,
-                        res.ocr_time_ms,
-                        res.llm_time_ms,
-                        res.ocr_ok,
-                        res.llm_ok,
-                        res.error_msg,
-                        fps=last_fps,
-                        debounced_ocr=res.debounced_ocr,
-                        vision_llm_text=res.vision_llm_text or None,
-                        cross_validated_text=res.cross_validated_text or None,
-                    )
-                    frame = draw_text_block(frame, lines, x=10, y=10, font_size=18, color_bgr=(0, 255, 0))
-                show_camera = state.get_show_camera_window()
-                if show_camera:
-                    cv2.imshow(win, frame)
-                else:
-                    global _placeholder_frame
-                    if _placeholder_frame is None or _placeholder_frame.shape[:2] != frame.shape[:2]:
-                        _placeholder_frame = np.zeros((frame.shape[0], frame.shape[1], 3), dtype=np.uint8)
-                        _placeholder_frame[:] = (36, 36, 36)
-                        _placeholder_frame = draw_text_block(
-                            _placeholder_frame,
-                            ["摄像头已隐藏", "点击对话窗口「打开摄像头」恢复识别"],
-                            x=24, y=24, font_size=20, color_bgr=(180, 180, 180),
-                        )
-                    cv2.imshow(win, _placeholder_frame)
-            except Exception as e:
-                log(f"主循环单帧异常: {e}", level="ERROR")
-                save_debug_frame(frame, "frame_error")
+            # 本轮只 grab 未解码（frame 为 None）：不刷新画面，照常处理按键与对话窗口
+            if frame is not None:
+                try:
+                    metrics.tick_frame()
+                    state.set_frame(frame)
+                    show_camera = state.get_show_camera_window()
+                    # 隐藏或不叠加文字（"none"）时不读结果、不组装文字行
+                    if show_camera and display_mode == "minimal":
+                        res = state.get_latest_result()
+                        # 结果与 FPS 都没变时沿用上次的文字行（组装时的差别率是 O(n·m) 的 LCS）
+                        if res != overlay_res or last_fps != overlay_fps:
+                            overlay_lines = build_display_lines_compact(
+                                res.raw_ocr,
+                                res.corrected,
+                                res.confidence,
+                                res.ocr_time_ms,
+                                res.llm_time_ms,
+                                fps=last_fps,
+                                debounced_ocr=res.debounced_ocr,
+                            )
+                            overlay_res, overlay_fps = res, last_fps
+                        h, w = frame.shape[:2]
+                        frame = draw_text_block(frame, overlay_lines, x=max(10, w - 520), y=max(10, h - 80), font_size=14, color_bgr=(0, 255, 0))
+                    elif show_camera and display_mode != "none":
+                        res = state.get_latest_result()
+                        if res != overlay_res or last_fps != overlay_fps:
+                            overlay_lines = build_display_lines(
+                                res.raw_ocr,
+                                res.corrected,
+                                res.confidence,
+                                res.ocr_time_ms,
+                                res.llm_time_ms,
+                                res.ocr_ok,
+                                res.llm_ok,
+                                res.error_msg,
+                                fps=last_fps,
+                                debounced_ocr=res.debounced_ocr,
+                                vision_llm_text=res.vision_llm_text or None,
+                                cross_validated_text=res.cross_validated_text or None,
+                            )
+                            overlay_res, overlay_fps = res, last_fps
+                        frame = draw_text_block(frame, overlay_lines, x=10, y=10, font_size=18, color_bgr=(0, 255, 0))
+                    if show_camera:
+                        cv2.imshow(win, frame)
+                    else:
+                        cv2.imshow(win, _get_placeholder(frame.shape[0], frame.shape[1]))
+                except Exception as e:
+                    log(f"主循环单帧异常: {e}", level="ERROR")
+                    save_debug_frame(frame, "frame_error")
             if _chat_window is not None:
                 _chat_window.update_from_state()
                 _chat_window.update()
@@ -302,26 +378,19 @@ def main() -> int:
                 break
             if key == ord("q") or key == ord("Q"):
                 break
-            res = state.get_latest_result()
-            content = (res.corrected or res.debounced_ocr or "").strip()
-            key_r = getattr(config, "KEY_READ", ord("r"))
-            key_t = getattr(config, "KEY_TRANSLATE", ord("t"))
-            key_p = getattr(config, "KEY_PRONOUNCE", ord("p"))
-            key_e = getattr(config, "KEY_EXAMPLES", ord("e"))
-            if key == key_r or key == key_r - 32:
-                state.set_pending_user_command("read", content)
-            elif content and (key == key_t or key == key_t - 32):
-                state.set_pending_user_command("translate", content)
-            elif content and (key == key_p or key == key_p - 32):
-                state.set_pending_user_command("pronounce", content)
-            elif content and (key == key_e or key == key_e - 32):
-                state.set_pending_user_command("examples", content)
+            cmd = cmd_keymap.get(key)
+            if cmd:
+                res = state.get_latest_result()
+                content = (res.corrected or res.debounced_ocr or "").strip()
+                # 朗读无内容时也下发（由管道回复“暂无文字”），其余指令需有内容
+                if cmd == "read" or content:
+                    state.set_pending_user_command(cmd, content)
             now = time.monotonic()
-            if now - last_metrics_time >= getattr(config, "METRICS_LOG_INTERVAL_SEC", 30):
+            if now - last_metrics_time >= metrics_interval:
                 fps, count = metrics.snapshot_fps()
                 ocr_ms, llm_ms = metrics.get_last_ocr_llm_ms()
                 pending = state.get_pending_frames_count()
-                log_metrics(fps, ocr_ms, llm_ms, pending)
+                log_metrics(fps, ocr_ms, llm_ms, pending, metrics.get_cache_stats())
                 last_fps = fps
                 last_metrics_time = now
     except KeyboardInterrupt:
@@ -331,6 +400,11 @@ def main() -> int:
             shutdown_ocr_process_pool()
         except Exception:
             pass
+        try:
+            from agents.tts_agent import shutdown_player
+            shutdown_player()
+        except Exception:
+            pass
         proc = state.get_web_server_process()
         if proc is not None:
             try:
@@ -14,21 +14,26 @@ os.chdir(_root)
 os.environ.setdefault("FLAGS_use_mkldnn", "0")
 os.environ.setdefault("FLAGS_use_onednn", "0")
 
-# 清掉可能冲突的 tools 缓存，强制用本项目
-for _n in list(sys.modules):
-    if _n == "tools" or _n.startswith("tools."):
+# 清掉可能冲突的 tools 缓存，强制用本项目；未导入或已是本项目的 tools 时不扫 sys.modules
+_tools_mod = sys.modules.get("tools")
+if _tools_mod is not None and os.path.dirname(
+    os.path.abspath(getattr(_tools_mod, "__file__", None) or "")
+) != os.path.join(_root, "tools"):
+    for _n in [n for n in sys.modules if n == "tools" or n.startswith("tools.")]:
         del sys.modules[_n]
 
-from typing import Optional
+from typing import Optional, Tuple
 
 import cv2
 import numpy as np
 from fastapi import File, HTTPException, UploadFile
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 from pydantic import BaseModel
 
 # 业务模块在 path 与 env 就绪后再导入
+import config
 from tools.ocr_engine import run_ocr
 from agents.llm_correct import correct_with_llm
 
@@ -50,10 +55,68 @@ app.add_middleware(
 )
 
 
+# JPEG 帧头（SOF）标记：C0~CF 中除 C4(DHT)、C8(JPG)、CC(DAC) 外都带图像宽高
+_JPEG_SOF_MARKERS = frozenset(range(0xC0, 0xD0)) - {0xC4, 0xC8, 0xCC}
+# 解码时缩小倍数 → imdecode 标志；JPEG 走 libjpeg 的 DCT 域缩放，不解出全分辨率
+_REDUCED_FLAGS = ((8, cv2.IMREAD_REDUCED_COLOR_8), (4, cv2.IMREAD_REDUCED_COLOR_4), (2, cv2.IMREAD_REDUCED_COLOR_2))
+
+
+def _jpeg_size(data: bytes) -> Optional[Tuple[int, int]]:
+    """只读 JPEG 段头取 (宽, 高)，不解码像素；非 JPEG 或格式异常返回 None。"""
+    if data[:3] != b"\xff\xd8\xff":
+        return None
+    i, n = 2, len(data)
+    while i + 9 <= n:
+        if data[i] != 0xFF:
+            return None
+        marker = data[i + 1]
+        if marker == 0xFF:  # 填充字节
+            i += 1
+            continue
+        if marker == 0x01 or 0xD0 <= marker <= 0xD8:  # 无长度字段的标记
+            i += 2
+            continue
+        if marker in _JPEG_SOF_MARKERS:
+            h = int.from_bytes(data[i + 5 : i + 7], "big")
+            w = int.from_bytes(data[i + 7 : i + 9], "big")
+            return (w, h) if w > 0 and h > 0 else None
+        i += 2 + int.from_bytes(data[i + 2 : i + 4], "big")
+    return None
+
+
+def _ocr_min_short_edge() -> int:
+    """
+    OCR 预处理（ROI 裁剪 → 缩到 OCR_RESIZE_SHORT_EDGE）实际需要的原图短边；0=不缩放，需全分辨率。
+    不按 OCR_ROI_UPSCALE 折算：放大只是插值、不增加细节，缩小解码后再放大会比原来少真实像素。
+    """
+    short = float(getattr(config, "OCR_RESIZE_SHORT_EDGE", 0) or 0)
+    if short <= 0:
+        return 0
+    if getattr(config, "OCR_USE_ROI", True):
+        short /= max(1e-3, float(getattr(config, "OCR_ROI_CENTER_RATIO", 0.7)))
+    return int(short) + 2  # 余量：裁剪/缩放中的取整
+
+
 def _image_bytes_to_bgr(data: bytes) -> Optional[np.ndarray]:
-    """将上传的图片字节转为 OpenCV BGR 数组，失败返回 None。"""
+    """
+    将上传的图片字节转为 OpenCV BGR 数组，失败返回 None。
+    手机拍的 JPEG 动辄 1200 万像素，而 OCR 预处理最终会缩到 OCR_RESIZE_SHORT_EDGE：
+    先读帧头尺寸，在短边仍够用的前提下按 1/2、1/4、1/8 缩小解码，省去解码与后续缩放全尺寸像素。
+    仍用 cv2.imdecode（opencv-python 自带 libjpeg-turbo），会按 EXIF 方向旋正手机照片。
+    """
     arr = np.frombuffer(data, dtype=np.uint8)
-    img = cv2.imdecode(arr, cv2.IMREAD_COLOR)
+    flags = cv2.IMREAD_COLOR
+    size = _jpeg_size(data) if getattr(config, "SERVER_JPEG_REDUCED_DECODE", True) else None
+    need = _ocr_min_short_edge()
+    if size is not None and need > 0:
+        short = min(size)
+        for factor, reduced in _REDUCED_FLAGS:
+            if short // factor >= need:
+                flags = reduced
+                break
+    img = cv2.imdecode(arr, flags)
+    if img is None and flags != cv2.IMREAD_COLOR:
+        img = cv2.imdecode(arr, cv2.IMREAD_COLOR)
     return img
 
 
@@ -75,20 +138,21 @@ def api_health():
 
 
 @app.post("/api/recognize", response_model=RecognizeResponse)
-def api_recognize(file: UploadFile = File(...)):
+async def api_recognize(file: UploadFile = File(...)):
     """
     上传一张图片，返回 OCR 原始结果 + LLM 纠错结果（与桌面端「截图识别」一致）。
     支持常见图片格式：PNG、JPEG、BMP、WebP 等。
+    上传在事件循环里异步读取；解码、OCR、LLM 等阻塞步骤放线程池，慢请求不占住其他客户端的上传。
     """
-    content = file.file.read()
+    content = await file.read()
     if not content:
         raise HTTPException(status_code=400, detail="请上传非空图片")
-    image = _image_bytes_to_bgr(content)
+    image = await run_in_threadpool(_image_bytes_to_bgr, content)
     if image is None:
         raise HTTPException(status_code=400, detail="无法解析图片，请换一张或检查格式")
 
-    # 复用现有 OCR（与 worker 中一致）
-    ocr_result = run_ocr(image)
+    # 复用现有 OCR（与 worker 中一致；Paddle 推理由 ocr_engine 内部的锁串行化）
+    ocr_result = await run_in_threadpool(run_ocr, image)
     raw_text = ocr_result.text or ""
     ocr_ok = ocr_result.success
     ocr_time_ms = ocr_result.time_ms
@@ -109,7 +173,7 @@ def api_recognize(file: UploadFile = File(...)):
         )
 
     # LLM 纠错（与 worker 中一致）
-    llm_result = correct_with_llm(raw_text.strip())
+    llm_result = await run_in_threadpool(correct_with_llm, raw_text.strip())
     corrected = llm_result.corrected_text if llm_result.success else raw_text.strip()
     llm_time_ms = llm_result.time_ms
     llm_ok = llm_result.success
@@ -1,7 +1,9 @@
 # -*- coding: utf-8 -*-
 """Agent D：滚动日志、可选 debug 存帧；不阻塞主流程."""
 import os
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 from typing import Optional
 
 import config
@@ -65,18 +67,23 @@ def log_result(raw: str, corrected: str, confidence: float, ocr_ms: float, llm_m
         log(f"LLM 已修正: 「{raw_s}」 -> 「{cor_s}」", level="INFO")
 
 
-def log_metrics(fps: float, ocr_ms: float, llm_ms: float, pending: int) -> None:
-    log(
-        f"METRICS fps={fps:.1f} ocr_ms={ocr_ms:.0f} llm_ms={llm_ms:.0f} pending={pending}",
-        level="INFO",
-    )
+def log_metrics(
+    fps: float, ocr_ms: float, llm_ms: float, pending: int, cache_stats: Optional[dict] = None
+) -> None:
+    msg = f"METRICS fps={fps:.1f} ocr_ms={ocr_ms:.0f} llm_ms={llm_ms:.0f} pending={pending}"
+    if cache_stats:
+        msg += f" cache_hits={cache_stats.get('hits', 0)} cache_misses={cache_stats.get('misses', 0)}"
+    log(msg, level="INFO")
 
 
-def save_debug_frame(frame, reason: str = "error") -> None:
-    """可选：将当前帧写入 logs/frames/，仅当 LOG_DEBUG_SAVE_FRAMES > 0 且 frame 非空."""
-    n = getattr(config, "LOG_DEBUG_SAVE_FRAMES", 0)
-    if n <= 0 or frame is None:
-        return
+# 存帧放到单个后台线程：JPEG 编码 + 写盘 + 清理旧文件不占用采集/OCR 线程
+_frame_writer = None
+_frame_writer_lock = threading.Lock()
+_frames_pending = 0
+
+
+def _write_debug_frame(frame, reason: str, keep: int) -> None:
+    """编码并写入 logs/frames/，只保留最近 keep 个文件。"""
     try:
         import cv2  # type: ignore[import-untyped]
         log_dir = _ensure_log_dir()
@@ -86,13 +93,54 @@ def save_debug_frame(frame, reason: str = "error") -> None:
         os.makedirs(frames_dir, exist_ok=True)
         name = f"{reason}_{time.strftime('%H%M%S', time.localtime())}.jpg"
         path = os.path.join(frames_dir, name)
-        cv2.imwrite(path, frame)
+        quality = int(getattr(config, "LOG_DEBUG_FRAME_QUALITY", 80))
+        ok, buf = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, quality])
+        if not ok:
+            return
+        with open(path, "wb") as f:
+            f.write(buf.tobytes())
         # 只保留最近 N 个文件
         files = sorted([f for f in os.listdir(frames_dir) if f.endswith(".jpg")], key=lambda f: os.path.getmtime(os.path.join(frames_dir, f)))
-        for f in files[:-n]:
+        for f in files[:-keep]:
             try:
                 os.remove(os.path.join(frames_dir, f))
             except Exception:
                 pass
     except Exception:
         pass
+
+
+def _write_debug_frame_bg(frame, reason: str, keep: int) -> None:
+    global _frames_pending
+    try:
+        _write_debug_frame(frame, reason, keep)
+    finally:
+        with _frame_writer_lock:
+            _frames_pending -= 1
+
+
+def save_debug_frame(frame, reason: str = "error") -> None:
+    """可选：将当前帧写入 logs/frames/，仅当 LOG_DEBUG_SAVE_FRAMES > 0 且 frame 非空."""
+    global _frame_writer, _frames_pending
+    n = getattr(config, "LOG_DEBUG_SAVE_FRAMES", 0)
+    if n <= 0 or frame is None:
+        return
+    if not getattr(config, "LOG_DEBUG_FRAME_ASYNC", True):
+        _write_debug_frame(frame, reason, n)
+        return
+    try:
+        with _frame_writer_lock:
+            # 连续出错时写盘跟不上：排队的帧已有 N 张就丢弃新帧，内存不超过 N 帧
+            if _frames_pending >= n:
+                return
+            if _frame_writer is None:
+                _frame_writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="debug_frames")
+            _frames_pending += 1
+        try:
+            # 复制一份：调用方会继续复用/改写这块帧缓冲
+            _frame_writer.submit(_write_debug_frame_bg, frame.copy(), reason, n)
+        except Exception:
+            with _frame_writer_lock:
+                _frames_pending -= 1
+    except Exception:
+        pass
@@ -4,7 +4,7 @@ from __future__ import annotations
 
 import threading
 import time
-from typing import Optional
+from typing import Callable, Dict, Optional
 
 
 class Metrics:
@@ -16,6 +16,7 @@ class Metrics:
         self._last_ocr_ms: float = 0.0
         self._last_llm_ms: float = 0.0
         self._pending_frames = 0  # 由外部按 shared_state 快照写入
+        self._cache_stats_source: Optional[Callable[[], Dict[str, int]]] = None  # 由 worker 注册 LLMCache.stats
 
     def tick_frame(self) -> None:
         with self._lock:
@@ -43,3 +44,13 @@ class Metrics:
     def get_last_ocr_llm_ms(self) -> tuple[float, float]:
         with self._lock:
             return (self._last_ocr_ms, self._last_llm_ms)
+
+    def set_cache_stats_source(self, source: Optional[Callable[[], Dict[str, int]]]) -> None:
+        with self._lock:
+            self._cache_stats_source = source
+
+    def get_cache_stats(self) -> Optional[Dict[str, int]]:
+        """LLM 缓存累计命中/未命中；未注册缓存时返回 None。"""
+        with self._lock:
+            source = self._cache_stats_source
+        return source() if source is not None else None
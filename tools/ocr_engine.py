@@ -214,6 +214,29 @@ def _paddle_env_and_import():
     return PaddleOCR
 
 
+def _create_paddle_engine(PaddleOCR, lang: str, gpu: bool):
+    """创建 PaddleOCR 引擎；GPU 时按 config 附带推理精度与 TensorRT 选项（fp16 需配合 TensorRT 才生效）。"""
+    extra = {}
+    if gpu:
+        precision = getattr(config, "PADDLE_OCR_PRECISION", "fp32")
+        if precision and precision != "fp32":
+            extra["precision"] = precision
+        if getattr(config, "PADDLE_OCR_USE_TENSORRT", False):
+            extra["use_tensorrt"] = True
+    try:
+        return PaddleOCR(lang=lang, use_angle_cls=True, device="gpu:0" if gpu else "cpu", **extra)
+    except TypeError:
+        return PaddleOCR(use_angle_cls=True, lang=lang, use_gpu=gpu, **extra)
+
+
+def _should_retry_paddle_on_cpu(gpu: bool, e: Exception) -> bool:
+    """GPU 引擎创建失败时是否改用 CPU 重建：PDX 重复初始化类错误重建也无用，其余（无 CUDA、AnalysisConfig 等）都回退 CPU。"""
+    err = str(e).lower()
+    if "pdx" in err or "reinitialization" in err or "already been initialized" in err:
+        return False
+    return gpu or "analysisconfig" in err or "libpaddle" in err
+
+
 def init_paddle_ocr_engine() -> bool:
     """
     在主线程、启动 worker 之前调用，只做一次 PaddleOCR 引擎创建，避免多线程下 PDX 重复初始化。
@@ -235,19 +258,12 @@ def init_paddle_ocr_engine() -> bool:
         force_cpu = getattr(config, "PADDLE_OCR_FORCE_CPU", True)
         use_gpu = False if force_cpu else getattr(config, "OCR_GPU", True)
 
-        def _create(gpu: bool):
-            try:
-                return PaddleOCR(lang=lang, use_angle_cls=True, device="gpu:0" if gpu else "cpu")
-            except TypeError:
-                return PaddleOCR(use_angle_cls=True, lang=lang, use_gpu=gpu)
-
         try:
             try:
-                _run_paddle_ocr.ocr_engine = _create(use_gpu)
+                _run_paddle_ocr.ocr_engine = _create_paddle_engine(PaddleOCR, lang, use_gpu)
             except Exception as ae:
-                err = str(ae).lower()
-                if "analysisconfig" in err or "libpaddle" in err:
-                    _run_paddle_ocr.ocr_engine = _create(False)
+                if _should_retry_paddle_on_cpu(use_gpu, ae):
+                    _run_paddle_ocr.ocr_engine = _create_paddle_engine(PaddleOCR, lang, False)
                 else:
                     raise
             # 在主线程里跑一次 dummy ocr，让 PDX 推理路径也只初始化一次
@@ -315,19 +331,12 @@ def _run_paddle_ocr(image) -> OCRResult:
                 )
                 use_gpu = False if force_cpu else getattr(config, "OCR_GPU", True)
 
-                def _create_engine(gpu: bool):
-                    try:
-                        device = "gpu:0" if gpu else "cpu"
-                        return PaddleOCR(lang=lang, use_angle_cls=True, device=device)
-                    except TypeError:
-                        return PaddleOCR(use_angle_cls=True, lang=lang, use_gpu=gpu)
-
                 try:
-                    _run_paddle_ocr.ocr_engine = _create_engine(use_gpu)
+                    _run_paddle_ocr.ocr_engine = _create_paddle_engine(PaddleOCR, lang, use_gpu)
                 except Exception as ae:
                     err = str(ae).lower()
-                    if "analysisconfig" in err or "libpaddle" in err:
-                        _run_paddle_ocr.ocr_engine = _create_engine(False)
+                    if _should_retry_paddle_on_cpu(use_gpu, ae):
+                        _run_paddle_ocr.ocr_engine = _create_paddle_engine(PaddleOCR, lang, False)
                     else:
                         if "pdx" in err or "reinitialization" in err or "already been initialized" in err:
                             _paddle_ocr_fatal = True
@@ -1,5 +1,6 @@
 # -*- coding: utf-8 -*-
 """中文叠加显示：PIL 绘制文本到 OpenCV 画面，结构清晰（原始/纠错/置信度/耗时）"""
+import functools
 import os
 from typing import Optional
 
@@ -16,7 +17,9 @@ except ImportError:
     HAS_PIL = False
 
 
+@functools.lru_cache(maxsize=8)
 def _get_font(size: int = 20):
+    """按字号缓存字体对象：每帧叠加都要取字体，避免反复 stat + 打开并解析 TTF。"""
     for path in config.FONT_PATHS:
         if os.path.isfile(path):
             try:
@@ -26,6 +29,76 @@ def _get_font(size: int = 20):
     return ImageFont.load_default()
 
 
+@functools.lru_cache(maxsize=1)
+def _measure_draw():
+    """仅用于 textbbox 量字的 1x1 画布（量字结果与画布大小无关），进程内复用一个。"""
+    return ImageDraw.Draw(Image.new("RGB", (1, 1)))
+
+
+@functools.lru_cache(maxsize=16)
+def _text_sprite(lines: tuple, h: int, w: int, x: int, y: int, font_size: int):
+    """
+    排版并栅格化文字块（与画面内容、颜色无关），按行返回 [(底框 (y0, y1, x0, x1), 字形覆盖 (y, x, alpha) 或 None)]；
+    无可画的行返回 None。绘制时逐行先把底框填黑、再按 alpha 混入字色，与逐行 PIL 画框 + 画字结果一致。
+    """
+    font = _get_font(font_size)
+    # 先量排版：每行 (y_off, 文本, tw, th, bbox)；量字不依赖画面，用 1x1 的量具画布
+    measure = _measure_draw()
+    ops = []
+    y_off = y
+    for line in lines:
+        if not line:
+            y_off += font_size + 4
+            continue
+        # 单行 try/except：Unicode/字体异常时不崩整块绘制（Agent D）
+        try:
+            line_str = line if isinstance(line, str) else str(line)
+            line_str = line_str.encode("utf-8", errors="replace").decode("utf-8")  # 替换不可显示字符
+        except Exception:
+            line_str = "?"
+        try:
+            try:
+                bbox = measure.textbbox((0, 0), line_str, font=font)
+                tw, th = bbox[2] - bbox[0], bbox[3] - bbox[1]
+            except AttributeError:
+                bbox = None
+                tw, th = (font.getsize(line_str) if hasattr(font, "getsize") else (len(line_str) * font_size, font_size))
+            if x + tw > w or y_off + th > h:
+                break
+            ops.append((y_off, line_str, tw, th, bbox))
+            y_off += th + 6
+        except Exception:
+            y_off += font_size + 6
+    if not ops:
+        return None
+    sprite = []
+    for y_off, line_str, tw, th, bbox in ops:
+        # PIL 的矩形含右/下边界，故 +5；超出画面部分裁掉
+        rect = (max(0, y_off), min(h, y_off + th + 5), max(0, x), min(w, x + tw + 5))
+        # 字形覆盖：在外扩 font_size 余量的 L 画布上用 255 画字，得到的就是 PIL 混合用的 alpha
+        ink = bbox or (0, 0, tw, th)
+        cx0, cy0 = max(0, x + 2 + ink[0] - font_size), max(0, y_off + 2 + ink[1] - font_size)
+        cx1, cy1 = min(w, x + 2 + ink[2] + font_size), min(h, y_off + 2 + ink[3] + font_size)
+        mask_ink = None
+        if cx0 < cx1 and cy0 < cy1:
+            try:
+                canvas = Image.new("L", (cx1 - cx0, cy1 - cy0), 0)
+                ImageDraw.Draw(canvas).text((x + 2 - cx0, y_off + 2 - cy0), line_str, font=font, fill=255)
+                mask = np.asarray(canvas)
+                ys, xs = np.nonzero(mask)
+                if ys.size:
+                    my0, my1, mx0, mx1 = ys.min(), ys.max() + 1, xs.min(), xs.max() + 1
+                    mask_ink = (
+                        cy0 + int(my0),
+                        cx0 + int(mx0),
+                        mask[my0:my1, mx0:mx1].astype(np.uint32)[:, :, None],
+                    )
+            except Exception:
+                pass
+        sprite.append((rect, mask_ink))
+    return sprite
+
+
 def draw_text_block(
     img_bgr: np.ndarray,
     lines: list,
@@ -40,34 +113,26 @@ def draw_text_block(
         return img_bgr
     h, w = img_bgr.shape[:2]
     if HAS_PIL:
-        img_pil = Image.fromarray(cv2.cvtColor(img_bgr, cv2.COLOR_BGR2RGB))
-        draw = ImageDraw.Draw(img_pil)
-        font = _get_font(font_size)
-        y_off = y
-        for line in lines:
-            if not line:
-                y_off += font_size + 4
+        # 文字块按 (行内容, 画面尺寸, 位置, 字号) 缓存：OCR 结果几百毫秒才变一次，其余帧只做底框填黑 + 字形混合
+        args = (h, w, x, y, font_size)
+        try:
+            sprite = _text_sprite(tuple(lines), *args)
+        except TypeError:  # 行里有不可哈希的对象：不走缓存
+            sprite = _text_sprite.__wrapped__(tuple(lines), *args)
+        if sprite is None:
+            return img_bgr
+        # 调用方传入的帧可能仍被 SharedState 引用（OCR 线程在读），不能原地改，复制一份再画
+        img_bgr = img_bgr.copy()
+        color = np.array(color_bgr[:3], dtype=np.uint32)
+        for (ry0, ry1, rx0, rx1), ink in sprite:
+            img_bgr[ry0:ry1, rx0:rx1] = 0
+            if ink is None:
                 continue
-            # 单行 try/except：Unicode/字体异常时不崩整块绘制（Agent D）
-            try:
-                line_str = line if isinstance(line, str) else str(line)
-                line_str = line_str.encode("utf-8", errors="replace").decode("utf-8")  # 替换不可显示字符
-            except Exception:
-                line_str = "?"
-            try:
-                try:
-                    bbox = draw.textbbox((0, 0), line_str, font=font)
-                    tw, th = bbox[2] - bbox[0], bbox[3] - bbox[1]
-                except AttributeError:
-                    tw, th = (font.getsize(line_str) if hasattr(font, "getsize") else (len(line_str) * font_size, font_size))
-                if x + tw > w or y_off + th > h:
-                    break
-                draw.rectangle([x, y_off, x + tw + 4, y_off + th + 4], fill=(0, 0, 0))
-                draw.text((x + 2, y_off + 2), line_str, font=font, fill=(color_bgr[2], color_bgr[1], color_bgr[0]))
-                y_off += th + 6
-            except Exception:
-                y_off += font_size + 6
-        img_bgr = cv2.cvtColor(np.array(img_pil), cv2.COLOR_RGB2BGR)
+            my, mx, mask = ink
+            region = img_bgr[my : my + mask.shape[0], mx : mx + mask.shape[1]]
+            # 与 PIL 画字时的混合一致：(底色*(255-a) + 字色*a) / 255，四舍五入的整数实现
+            t = region * (255 - mask) + color * mask + 128
+            region[:] = ((t >> 8) + t) >> 8
     else:
         for i, line in enumerate(lines):
             try:
@@ -8,14 +8,16 @@ from __future__ import annotations
 import os
 import threading
 import time
+from collections import OrderedDict
 from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, TimeoutError as FuturesTimeoutError
 from typing import TYPE_CHECKING, Optional
 
+import cv2
 import numpy as np
 
 import config
 from agents.agent_e import LLMCache, LLMThrottler
-from agents.debounce import OCRDebouncer
+from agents.debounce import OCRDebouncer, text_similarity
 from agents.llm_correct import correct_with_llm
 from tools.logger_util import log_result
 from tools.ocr_engine import run_ocr
@@ -27,33 +29,49 @@ if TYPE_CHECKING:
 
 
 class _CircuitBreaker:
-    """熔断：连续失败 N 次后，在 cooldown 秒内不再调用 LLM，直接降级返回原文。"""
+    """
+    熔断：连续失败 N 次后，在 cooldown 秒内不再调用 LLM，直接降级返回原文。
+    冷却结束即半开：放行下一次请求试探，成功则关闭并恢复初始冷却；失败则重新熔断，冷却时间乘以 backoff_mult（不超过 max_cooldown_sec）。
+    """
 
     def __init__(
         self,
         failure_threshold: int,
         cooldown_sec: float,
+        backoff_mult: float = 1.0,
+        max_cooldown_sec: Optional[float] = None,
     ):
         self._lock = threading.Lock()
         self._failure_threshold = failure_threshold
         self._cooldown_sec = cooldown_sec
+        self._backoff_mult = max(1.0, backoff_mult)
+        self._max_cooldown_sec = cooldown_sec if max_cooldown_sec is None else max(cooldown_sec, max_cooldown_sec)
+        self._current_cooldown = cooldown_sec
         self._consecutive_failures = 0
         self._last_failure_time: float = 0.0
 
     def record_success(self) -> None:
         with self._lock:
             self._consecutive_failures = 0
+            self._current_cooldown = self._cooldown_sec
 
     def record_failure(self) -> None:
         with self._lock:
+            now = time.monotonic()
+            # 已熔断且冷却已过：这是半开试探失败，加长下一轮冷却
+            if (
+                self._consecutive_failures >= self._failure_threshold
+                and now - self._last_failure_time >= self._current_cooldown
+            ):
+                self._current_cooldown = min(self._current_cooldown * self._backoff_mult, self._max_cooldown_sec)
             self._consecutive_failures += 1
-            self._last_failure_time = time.monotonic()
+            self._last_failure_time = now
 
     def is_open(self) -> bool:
         with self._lock:
             if self._consecutive_failures < self._failure_threshold:
                 return False
-            return (time.monotonic() - self._last_failure_time) < self._cooldown_sec
+            return (time.monotonic() - self._last_failure_time) < self._current_cooldown
 
 
 # 子进程 OCR 用：避免 Paddle 在主进程/工作线程中释放 GIL 导致 PyEval_RestoreThread 崩溃
@@ -84,10 +102,60 @@ def _run_ocr_safe(frame: np.ndarray) -> "tuple[str, float, float, bool, str | No
     return (r.text, r.confidence, r.time_ms, r.success, r.error_msg)
 
 
-def _run_llm_safe(raw_text: str) -> "tuple[str, float, bool, str | None]":
-    """在线程池中运行 LLM，返回 (corrected_text, time_ms, success, error_msg)。"""
-    r = correct_with_llm(raw_text)
-    return (r.corrected_text, r.time_ms, r.success, r.error_msg)
+def _frame_hash(frame: np.ndarray, size: int = 8) -> int:
+    """均值感知哈希：缩到 size×size 灰度，逐像素与均值比较得 size*size 位整数；出错返回 -1。"""
+    try:
+        small = cv2.resize(frame, (size, size), interpolation=cv2.INTER_AREA)
+        if small.ndim == 3:
+            small = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+        return int.from_bytes(np.packbits(small > small.mean()).tobytes(), "big")
+    except Exception:
+        return -1
+
+
+def _lookup_ocr_by_hash(cache: "OrderedDict[int, tuple]", h: int, max_dist: int) -> Optional[tuple]:
+    """在帧哈希缓存中找汉明距离 <= max_dist 的条目，命中则移到末尾（LRU）并返回其 OCR 结果。"""
+    for key in reversed(cache):
+        if bin(key ^ h).count("1") <= max_dist:
+            cache.move_to_end(key)
+            return cache[key]
+    return None
+
+
+def _run_llm_safe(
+    raw_text: str,
+    cancel_event: Optional[threading.Event] = None,
+    cache: Optional[LLMCache] = None,
+    lang_hint: Optional[str] = None,
+) -> "tuple[str, float, bool, str | None]":
+    """
+    在线程池中运行 LLM，返回 (corrected_text, time_ms, success, error_msg)。
+    传入 cache 时经 LLMCache.get_or_fetch：命中直接返回，同一文本并发请求只发一次 LLM，成功结果自动写入缓存。
+    """
+    if cache is None:
+        r = correct_with_llm(raw_text, cancel_event=cancel_event)
+        return (r.corrected_text, r.time_ms, r.success, r.error_msg)
+    own: dict = {}
+
+    def _fetch() -> Optional[dict]:
+        r = correct_with_llm(raw_text, cancel_event=cancel_event)
+        own["r"] = r
+        if not r.success:
+            return None
+        return {
+            "corrected": r.corrected_text,
+            "confidence": r.confidence,
+            "language_hint": r.language_hint,
+            "llm_ms": r.time_ms,
+        }
+
+    entry = cache.get_or_fetch(raw_text, lang_hint, _fetch)
+    r = own.get("r")
+    if r is not None:
+        return (r.corrected_text, r.time_ms, r.success, r.error_msg)
+    if entry is not None:
+        return (entry["corrected"], float(entry.get("llm_ms", 0.0)), True, None)
+    return (raw_text, 0.0, False, "同一文本的并发 LLM 请求失败")
 
 
 def _run_vision_and_cross_validate(state: SharedState, corrected_text: str) -> None:
@@ -128,8 +196,14 @@ def _pipeline_loop(
     last_llm_lang_hint: Optional[str] = None
     last_sent_text: Optional[str] = None
     last_corrected: Optional[str] = None
+    # 上次计入缓存命中的稳定文本：逐帧命中同一文本只计一次，统计按请求而非按帧
+    last_cache_hit_text: Optional[str] = None
     # LLM 异步：不阻塞管道，提交后立即继续做 OCR，结果在下一轮合并
     pending_llm: Optional[tuple] = None  # (future, stable_text, conf, ocr_ms, display_raw, err_msg)
+    # 在途 LLM 的取消信号：稳定文本已换成别的内容时 set，让其重试等待立即结束
+    pending_cancel: Optional[threading.Event] = None
+    # 帧哈希 → OCR 结果（raw_text, conf）：静止画面的近似帧直接复用上次识别结果，跳过 50~260ms 的 OCR
+    ocr_hash_cache: "OrderedDict[int, tuple]" = OrderedDict()
 
     while True:
         # 用户指令 Agent：读/翻译/读音/例句（主线程已 set_pending_user_command），放入线程执行避免阻塞 OCR
@@ -215,7 +289,9 @@ def _pipeline_loop(
                             if last_user_idx is not None
                             else (history[:-1] if history else [])
                         )
-                        recent = [(h[0], h[1]) for h in raw] if raw else []
+                        # 只取 LLM 会用到的最近 N 条（与 voice_assistant_agent 的切片一致），不为整段历史建元组
+                        context_n = getattr(config, "VOICE_ASSISTANT_CONTEXT_MESSAGES", 24)
+                        recent = [(h[0], h[1]) for h in raw[-context_n:]] if raw else []
                         content = state.get_content_for_command()
                         uploaded_name, uploaded_content = state.get_uploaded_file()
 
@@ -337,22 +413,13 @@ def _pipeline_loop(
                     corrected, llm_ms, llm_ok, llm_err = future_llm.result(timeout=0)
                 except Exception as e:
                     corrected, llm_ms, llm_ok, llm_err = pending_stable, 0.0, False, str(e)
-                if llm_ok:
+                if llm_err == "cancelled":
+                    # 主动取消不计入熔断；清掉 last_sent_text，该文本再次稳定时可重新提交
+                    last_sent_text = None
+                elif llm_ok:
                     circuit_breaker.record_success()
                     last_sent_text = pending_stable
                     last_corrected = corrected
-                    if cache is not None and pending_stable.strip():
-                        try:
-                            cache.put(
-                                text=pending_stable,
-                                lang_hint=last_llm_lang_hint,
-                                corrected=corrected,
-                                confidence=None,
-                                language_hint=None,
-                                llm_ms=llm_ms,
-                            )
-                        except Exception:
-                            pass
                 else:
                     circuit_breaker.record_failure()
                 combined_err = " ".join(filter(None, [pending_err, llm_err])) or None
@@ -381,6 +448,7 @@ def _pipeline_loop(
                     except Exception:
                         pass
                 pending_llm = None
+                pending_cancel = None
 
         # 截图识别：用户点击「截图识别」提交的一帧，做一次 OCR+LLM 不经过去抖
         # OCR 在管道线程内执行，避免 Paddle 在子线程中释放 GIL 导致崩溃
@@ -412,7 +480,7 @@ def _pipeline_loop(
             display_raw = raw_text
             # LLM 纠错（同步等待）
             try:
-                future_llm = executor.submit(_run_llm_safe, stable_text)
+                future_llm = executor.submit(_run_llm_safe, stable_text, None, cache, last_llm_lang_hint)
                 corrected, llm_ms, llm_ok, llm_err = future_llm.result(timeout=config.LLM_TIMEOUT_SEC + 5)
             except Exception as e:
                 corrected, llm_ms, llm_ok, llm_err = stable_text, 0.0, False, str(e)
@@ -459,7 +527,25 @@ def _pipeline_loop(
 
         # OCR 在管道线程内执行（避免 Paddle 在 ThreadPool 中释放 GIL 导致 PyEval_RestoreThread 崩溃）
         try:
-            raw_text, conf, ocr_ms, ocr_ok, err_msg = _run_ocr_safe(frame)
+            hash_cache_size = int(getattr(config, "OCR_FRAME_HASH_CACHE_SIZE", 0))
+            frame_h, cached_ocr = -1, None
+            if hash_cache_size > 0:
+                t_hash = time.perf_counter()
+                frame_h = _frame_hash(frame, int(getattr(config, "OCR_FRAME_HASH_SIZE", 8)))
+                if frame_h >= 0:
+                    cached_ocr = _lookup_ocr_by_hash(
+                        ocr_hash_cache, frame_h, int(getattr(config, "OCR_FRAME_HASH_MAX_DISTANCE", 2))
+                    )
+            if cached_ocr is not None:
+                raw_text, conf = cached_ocr
+                ocr_ms, ocr_ok, err_msg = (time.perf_counter() - t_hash) * 1000.0, True, None
+            else:
+                raw_text, conf, ocr_ms, ocr_ok, err_msg = _run_ocr_safe(frame)
+                # 只缓存成功的识别；失败（超时/引擎异常）下一帧照常重试
+                if ocr_ok and frame_h >= 0:
+                    ocr_hash_cache[frame_h] = (raw_text, conf)
+                    while len(ocr_hash_cache) > hash_cache_size:
+                        ocr_hash_cache.popitem(last=False)
         except Exception as e:
             raw_text, conf, ocr_ms = "", 0.0, 0.0
             ocr_ok = False
@@ -474,10 +560,9 @@ def _pipeline_loop(
         # 软稳定：当前帧与稳定文本相似度高，也视为已“识别完成”，触发 LLM
         soft_stable = is_stable
         if getattr(config, "OCR_SOFT_STABLE_ENABLED", True) and stable_text and raw_text:
-            from agents.debounce import text_similarity
-
-            sim = text_similarity(stable_text, raw_text)
-            if sim >= getattr(config, "OCR_SOFT_STABLE_SIMILARITY", 0.85):
+            soft_th = getattr(config, "OCR_SOFT_STABLE_SIMILARITY", 0.85)
+            sim = text_similarity(stable_text, raw_text, soft_th)
+            if sim >= soft_th:
                 soft_stable = True
 
         # 原始 OCR 一有结果就显示：raw_ocr 用当前帧识别结果 raw_text，不等到去抖
@@ -520,8 +605,17 @@ def _pipeline_loop(
             continue
 
         # Agent E：缓存命中则直接使用，不重复请求 LLM
-        cache_entry = cache.get(stable_text, last_llm_lang_hint) if cache is not None else None
+        # 本帧统一取一次时钟，缓存 TTL 与节流共用
+        tick_now = time.monotonic()
+        # stable_text 来自去抖器，已与 normalize_text 归一化一致，走免归一化的快速路径
+        # 逐帧查询不计统计：未命中由提交后的 get_or_fetch 计一次，命中按文本计一次
+        cache_entry = (
+            cache.get_normalized(stable_text, last_llm_lang_hint, now=tick_now, count=False) if cache is not None else None
+        )
         if cache_entry is not None:
+            if stable_text != last_cache_hit_text:
+                cache.record_hit()
+                last_cache_hit_text = stable_text
             corrected = cache_entry["corrected"]
             llm_ms = float(cache_entry.get("llm_ms", 0.0))
             combined_err = err_msg
@@ -585,7 +679,7 @@ def _pipeline_loop(
             continue
 
         # Agent E：节流，过于频繁则暂不请求 LLM，只显示原文
-        if throttler is not None and not throttler.can_call():
+        if throttler is not None and not throttler.can_call(now=tick_now):
             state.set_latest_result(
                 raw_ocr=display_raw,
                 corrected=stable_text,
@@ -600,8 +694,10 @@ def _pipeline_loop(
             time.sleep(0.05)
             continue
 
-        # 已有 LLM 在途则只更新画面（原始/去抖），不重复提交
+        # 已有 LLM 在途则只更新画面（原始/去抖），不重复提交；稳定文本已变则取消其重试等待
         if pending_llm is not None:
+            if pending_cancel is not None and stable_text != pending_llm[1]:
+                pending_cancel.set()
             state.set_latest_result(
                 raw_ocr=display_raw,
                 corrected=stable_text,
@@ -618,7 +714,9 @@ def _pipeline_loop(
 
         # 提交 LLM 异步执行，不阻塞；结果在下一轮循环中合并
         log(f"调用本地 LLM 纠错: 「{(stable_text[:60] + '...') if len(stable_text) > 60 else stable_text}」", level="INFO")
-        future_llm = executor.submit(_run_llm_safe, stable_text)
+        pending_cancel = threading.Event()
+        # 经缓存 single-flight 执行：与截图识别等并发的同文本请求只发一次，成功结果自动入缓存
+        future_llm = executor.submit(_run_llm_safe, stable_text, pending_cancel, cache, last_llm_lang_hint)
         last_sent_text = stable_text
         pending_llm = (future_llm, stable_text, conf, ocr_ms, display_raw, err_msg)
         state.set_latest_result(
@@ -645,16 +743,25 @@ def start_worker(state: SharedState, metrics: Optional["Metrics"] = None) -> thr
     circuit_breaker = _CircuitBreaker(
         failure_threshold=config.LLM_CIRCUIT_BREAKER_FAILURES,
         cooldown_sec=config.LLM_CIRCUIT_BREAKER_COOLDOWN_SEC,
+        backoff_mult=getattr(config, "LLM_CIRCUIT_BACKOFF_MULT", 2.0),
+        max_cooldown_sec=getattr(config, "LLM_CIRCUIT_MAX_COOLDOWN_SEC", 300),
     )
     debouncer = OCRDebouncer(
         history_len=getattr(config, "OCR_DEBOUNCE_HISTORY_LEN", 6),
         min_votes=getattr(config, "OCR_DEBOUNCE_MIN_VOTES", 4),
         similarity_vote=getattr(config, "OCR_DEBOUNCE_SIMILARITY_VOTE", 0.88),
     )
-    cache = LLMCache(
-        max_size=getattr(config, "LLM_CACHE_MAX_SIZE", 200),
-        ttl_sec=getattr(config, "LLM_CACHE_TTL_SEC", 600),
-    )
+    correct_ttl = (getattr(config, "LLM_CACHE_TTL", None) or {}).get("correct", getattr(config, "LLM_CACHE_TTL_SEC", 600))
+    cache: Optional[LLMCache] = None
+    if correct_ttl > 0:
+        cache = LLMCache(
+            max_size=getattr(config, "LLM_CACHE_MAX_SIZE", 200),
+            ttl_sec=correct_ttl,
+            db_path=getattr(config, "LLM_CACHE_DB", None) if getattr(config, "LLM_CACHE_BACKEND", "memory") == "sqlite" else None,
+            db_version=f"{getattr(config, 'PROMPT_VERSION', '')}|{getattr(config, 'LLM_MODEL', '')}",
+        )
+        if metrics is not None:
+            metrics.set_cache_stats_source(cache.stats)
     throttler = LLMThrottler(
         min_interval_ms=getattr(config, "LLM_MIN_INTERVAL_MS", 1000),
     )